@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+# benchMegapixel
+#
+# Usage:
+#  ./benchMegapixel.py -d dims -r reduns -t trueReduns -n repeats -q queries -o results.json -v
+#
+# Non-interactive benchmark of class megapix. For every valid (dim, redun, trueRedun) combination of the comma separated
+# lists given via -d, -r and -t, it times construction, get, getRowCol, the full-grid mapping (getIndexMap, with a cold
+# and a warm geometry cache) and the per-megapixel reductions. Each case is repeated -n times and the best time is kept.
+# -q sets the number of random megapixels queried through get and getRowCol.
+# Throughput (megapixels/s; instances/s for construction) and peak traced memory are reported for each case. Results
+# go into the JSON file given via -o, together with the versions of megapixel, Python and NumPy, for comparison across
+# versions.
+#
+# Versions
+#  v1.0 (October 18, 2026)
+#
+
+from __future__ import print_function
+
+import json
+import os
+import platform
+import sys
+import time
+from timeit import default_timer as timer
+
+import numpy as np
+
+import megapixel
+from megapixel import megapix, geometryCache
+
+try:
+    import tracemalloc
+except ImportError:                 # Python 2: peak memory is not traced
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:                 # Windows: no maxrss
+    resource = None
+
+VERSION = 1.0
+DATE = '2026-10-18'
+
+REDUCTIONS = [ 'mean', 'max', 'nanmean' ]
+
+
+#################################################################################################################
+# @brief times a callable, then measures its peak memory in one extra, untimed run (tracing slows the code down)
+# @param fn                (callable)           the code to time, called without arguments
+# @param repeats           (int)                number of timed runs
+# @param setup             (callable)           optional code run, untimed, before each run
+# @return [ best time in seconds, peak traced memory in bytes (None if not available) ]
+def measure(fn, repeats, setup=None):
+    best = None
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        t0 = timer()
+        fn()
+        dt = timer() - t0
+        best = dt if best is None else min(best, dt)
+
+    peak = None
+    if tracemalloc is not None:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return [ best, peak ]
+
+
+#################################################################################################################
+# @brief runs all the benchmark cases of one geometry
+# @param dim               (int)                dimension of the (dim x dim) physical image
+# @param redun             (int)                megapixel size
+# @param trueRedun         (int)                size of the region in which each physical pixel is replicated
+# @param repeats           (int)                number of runs of each case
+# @param queries           (int)                number of megapixels queried through get and getRowCol
+# @return a list of result dictionaries
+def benchGeometry(dim, redun, trueRedun, repeats, queries):
+    mp         = megapix(dim, redun, trueRedun)
+    megapixels = mp.megashape[0] * mp.megashape[1]
+    rng        = np.random.RandomState(0)
+    megarows   = rng.randint(0, mp.megashape[0], queries).tolist()
+    megacols   = rng.randint(0, mp.megashape[1], queries).tolist()
+    image      = rng.rand(dim, dim).astype(np.float32)
+
+    def construct():
+        for _ in range(queries):
+            megapix(dim, redun, trueRedun)
+
+    def get():
+        for i in range(queries):
+            mp.get(megarows[i], megacols[i])
+
+    def getRowCol():
+        for i in range(queries):
+            mp.getRowCol(megarows[i], megacols[i])
+
+    cases = [ ('construct',        construct,         queries,    None),
+              ('get',              get,               queries,    None),
+              ('getRowCol',        getRowCol,         queries,    None),
+              ('getIndexMap/cold', mp.getIndexMap,    megapixels, geometryCache.clear),
+              ('getIndexMap/warm', mp.getIndexMap,    megapixels, None) ]
+    for op in REDUCTIONS:
+        cases.append(('reduce/' + op, (lambda op=op: mp.reduce(image, op)), megapixels, None))
+
+    results = []
+    for name, fn, count, setup in cases:
+        seconds, peak = measure(fn, repeats, setup)
+        results.append({ 'dim' : dim, 'redun' : redun, 'trueRedun' : trueRedun, 'megapixels' : megapixels,
+                         'case' : name, 'count' : count, 'seconds' : seconds,
+                         'megapixelsPerSec' : count / seconds if seconds > 0 else None, 'peakBytes' : peak })
+    return results
+
+
+#################################################################################################################
+# @brief parses a comma separated list of integers
+# @return ditto
+def intList(arg):
+    return [ int(x) for x in arg.split(',') if x != '' ]
+
+
+#****************************************************************************
+## Main entry point
+#{
+if __name__ == '__main__' :
+
+    argv = sys.argv
+    argc = len(argv)
+
+    dims       = [ 256, 1024 ]
+    reduns     = [ 4, 5 ]
+    trueReduns = [ 1, 3 ]
+    repeats    = 3
+    queries    = 10000
+    oFile      = 'bench_megapixel.json'
+    verbose    = False
+    err        = False
+
+    i = 1
+    while i < argc :
+        arg = argv[i]
+        if len(arg) >= 2 and arg[0] == '-':
+            arg = arg[1:]
+            try:
+                if arg == 'd':
+                    i += 1
+                    dims = intList(argv[i])
+                elif arg == 'r':
+                    i += 1
+                    reduns = intList(argv[i])
+                elif arg == 't':
+                    i += 1
+                    trueReduns = intList(argv[i])
+                elif arg == 'n':
+                    i += 1
+                    repeats = int(argv[i])
+                elif arg == 'q':
+                    i += 1
+                    queries = int(argv[i])
+                elif arg == 'o':
+                    i += 1
+                    oFile = argv[i]
+                elif arg == 'v':
+                    verbose = True
+                else:
+                    sys.stderr.write('Erroneous argument caught: -{0}\n'.format(arg))
+                    err = True
+                    break
+            except (IndexError, ValueError):
+                sys.stderr.write('Missing or invalid value for -{0}\n'.format(arg))
+                err = True
+                break
+        else:
+            sys.stderr.write('Erroneous argument caught: {0}\n'.format(arg))
+            err = True
+            break
+        i += 1
+
+    if err or repeats < 1 or queries < 1:
+        sys.stderr.write('Error in the commandline arguments. Bailing out...\n')
+        sys.exit(-1)
+
+    results = []
+    for dim in dims:
+        for redun in reduns:
+            for trueRedun in trueReduns:
+                if megapix(dim, redun, trueRedun).getMegadim() == 0:
+                    if verbose:
+                        print('Skipping invalid geometry dim={0} redun={1} trueRedun={2}'.format(dim, redun, trueRedun))
+                    continue
+                for result in benchGeometry(dim, redun, trueRedun, repeats, queries):
+                    results.append(result)
+                    print('{dim:6d} {redun:3d} {trueRedun:3d}  {case:18s} {seconds:10.6f} s  {0:>14s} Mpx/s  peak {1:>10s} B'.format(
+                          '%.3f' % (result['megapixelsPerSec'] / 1e6) if result['megapixelsPerSec'] else '-',
+                          str(result['peakBytes']), **result))
+
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+    report = { 'megapixelVersion' : megapixel.VERSION, 'benchVersion' : VERSION,
+               'python' : platform.python_version(), 'numpy' : np.__version__, 'platform' : platform.platform(),
+               'date' : time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeats' : repeats, 'queries' : queries,
+               'maxRSSKiB' : maxRSS, 'results' : results }
+    try:
+        with open(oFile, 'w') as g:
+            json.dump(report, g, indent=1)
+    except (IOError, OSError):
+        sys.stderr.write('File {0} could not be written. Bailing out...\n'.format(oFile))
+        sys.exit(-1)
+    if verbose:
+        print('Results written to {0} (max RSS {1} KiB)'.format(os.path.abspath(oFile), maxRSS))
+#} end of main and file
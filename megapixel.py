@@ -13,55 +13,276 @@
 # - method getRowCol(megarow, megacol) returns a list of (row, col) couples with the locations of all the physical pixels
 #   corresponding to the mentioned megapixel. 
 #
-# Limitations:
-# The current version only works with square images and assumes that the megapixel image fits perfectly into the physical image
+# Rectangular images are managed by specifying dim as a (rows, cols) pair. When rows or cols are not multiples of redun,
+# the trailing pixels that cannot host a whole megapixel are treated as gap pixels. Rasters larger than RAM can be
+# opened as memory maps (openRaster) and reduced band by band (method iterReduce).
 #
 # Versions
 #  v1.0 (August 28, 2017)
 #  v1.1 (August 30, 2017)
+#  v1.2 (October 18, 2026)
 # 
 
+from __future__ import print_function
+
 import numpy as np
+import multiprocessing
+import threading
+import struct
 import sys
+import zlib
+from collections import OrderedDict
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:                 # Python < 3.8: reduce falls back to the serial path
+    shared_memory = None
+
+VERSION = 1.2
+DATE = '2026-10-18'
+
+try:
+    raw_input
+except NameError:
+    raw_input = input
+
+#################################################################################################################
+# @brief marks an array as read-only
+# @return ditto
+def _readOnly(a):
+    a.flags.writeable = False
+    return a
+
+
+class megageometry(object):
+    ########################################################################################################################
+    # @brief read-only index tables of a megapix configuration, shared by all the instances with the same geometry
+    # @details offsets, centers and the gap rows/cols are computed on construction; the larger tables (labels, pixels)
+    #          on first access, after which geometryCache is trimmed to its byte limit. All the tables are read-only.
+    # @param shape             (int, int)           (rows, cols) of the physical image
+    # @param redun             (int)                megapixel size
+    # @param trueRedun         (int)                size of the region in which each physical pixel is replicated
+    def __init__(self, shape, redun, trueRedun):
+        self.shape     = shape
+        self.redun     = redun
+        self.trueRedun = trueRedun
+        self.megashape = (shape[0] // redun, shape[1] // redun)
+        self.displace  = trueRedun // 2
+
+        # offsets[k] = [ dr, dc ] of the k-th window pixel (getRowCol order) with respect to the center
+        d = np.arange(trueRedun) - self.displace
+        self.offsets = _readOnly(np.stack(np.meshgrid(d, d, indexing='ij'), axis=-1).reshape(-1, 2))
+        # centers[i, j] = [ r, c ] of the center of megapixel (i, j), cf. megapix.get
+        r = np.arange(self.megashape[0]) * redun + self.displace
+        c = np.arange(self.megashape[1]) * redun + self.displace
+        self.centers = _readOnly(np.stack(np.meshgrid(r, c, indexing='ij'), axis=-1))
+
+        # per-axis maps: physical row (col) -> megarow (megacol), -1 outside the trueRedun windows
+        self.axisMaps = ( _readOnly(self._axisMap(0)), _readOnly(self._axisMap(1)) )
+        self.gapRows  = _readOnly(np.flatnonzero(self.axisMaps[0] < 0))
+        self.gapCols  = _readOnly(np.flatnonzero(self.axisMaps[1] < 0))
+        self._labels  = None
+        self._pixels  = None
+        self._linear  = None
+
+        # flat linear indices (row * cols + col) fit in int32 unless the image has more than 2**31 - 1 pixels
+        self.indexType = np.int32 if shape[0] * shape[1] <= np.iinfo(np.int32).max else np.int64
+
+    def _axisMap(self, axis):
+        pixel = np.arange(self.shape[axis])
+        mega  = pixel // self.redun
+        mega[(pixel % self.redun >= self.trueRedun) | (pixel >= self.megashape[axis] * self.redun)] = -1
+        return mega.astype(np.int32)
+
+    ####################################################################################################
+    # @brief int32 map, shaped as the image, of the megapixel id (megarow * megacols + megacol) of each
+    #        physical pixel, -1 for pixels outside any trueRedun window
+    @property
+    def labels(self):
+        if self._labels is None:
+            megaR, megaC = self.axisMaps
+            labels = megaR[:, None] * np.int32(self.megashape[1]) + megaC[None, :]
+            labels[(megaR[:, None] < 0) | (megaC[None, :] < 0)] = -1
+            self._labels = _readOnly(labels)
+            geometryCache.trim()
+        return self._labels
+
+    ####################################################################################################
+    # @brief (megarows * megacols, trueRedun * trueRedun, 2) array: pixels[k] lists the [ row, col ]
+    #        couples of megapixel k in getRowCol order
+    @property
+    def pixels(self):
+        if self._pixels is None:
+            pixels = self.centers.reshape(-1, 1, 2) + self.offsets[None, :, :]
+            self._pixels = _readOnly(pixels.astype(np.intp))
+            geometryCache.trim()
+        return self._pixels
+
+    ##########################################################################
+    # @brief flat rows (cols) of all the window pixels, grouped by megapixel
+    @property
+    def rows(self):
+        return self.pixels.reshape(-1, 2)[:, 0]
+
+    @property
+    def cols(self):
+        return self.pixels.reshape(-1, 2)[:, 1]
+
+    ####################################################################################################
+    # @brief (megarows * megacols, trueRedun * trueRedun) array of indexType: linear[k] lists the flat
+    #        indices (row * cols + col) of megapixel k in getRowCol order
+    @property
+    def linear(self):
+        if self._linear is None:
+            linear = self.pixels[:, :, 0] * self.shape[1] + self.pixels[:, :, 1]
+            self._linear = _readOnly(linear.astype(self.indexType))
+            geometryCache.trim()
+        return self._linear
+
+    ##########################################################################
+    # @brief bytes held by the tables built so far
+    @property
+    def nbytes(self):
+        tables = [ self.offsets, self.centers, self.gapRows, self.gapCols, self._labels, self._pixels, self._linear ]
+        return sum([ t.nbytes for t in list(self.axisMaps) + tables if t is not None ])
+
+
+class lruCache(object):
+    ########################################################################################################################
+    # @brief thread-safe, bounded least-recently-used cache with hit and miss counters
+    # @details With maxbytes, entries are also evicted while the total nbytes of the entries (an attribute, read on
+    #          each trim since entries may grow) exceeds maxbytes; the most recently used entry is always kept.
+    # @param maxsize           (int)                maximum number of entries
+    # @param maxbytes          (int)                maximum total size of the entries, in bytes (None: no limit)
+    def __init__(self, maxsize, maxbytes=None):
+        self.maxsize = int(maxsize)
+        self.maxbytes = maxbytes
+        self.hits    = 0
+        self.misses  = 0
+        self._items  = OrderedDict()
+        self._lock   = threading.Lock()
+
+    ###########################################################################################
+    # @brief returns the entry of key, building it as build(*key) and storing it on a miss
+    # @return ditto
+    def get(self, key, build):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is not None:
+                self.hits += 1
+                self._items[key] = item
+                self._trim()
+                return item
+            self.misses += 1
+        item = build(*key)
+        with self._lock:
+            self._items[key] = item
+            self._trim()
+        return item
+
+    def _trim(self):
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        if self.maxbytes is not None:
+            total = self._bytes()
+            while len(self._items) > 1 and total > self.maxbytes:
+                total -= getattr(self._items.popitem(last=False)[1], 'nbytes', 0)
+
+    def _bytes(self):
+        return sum([ getattr(item, 'nbytes', 0) for item in self._items.values() ])
+
+    ##########################################################################
+    # @brief evicts entries until the limits hold again (e.g. after entries grew)
+    def trim(self):
+        with self._lock:
+            self._trim()
+
+    ##########################################################################
+    # @brief returns the cache statistics (hits, misses, size, maxsize, bytes, maxbytes)
+    # @return ditto
+    def info(self):
+        with self._lock:
+            return { 'hits' : self.hits, 'misses' : self.misses, 'size' : len(self._items), 'maxsize' : self.maxsize,
+                     'bytes' : self._bytes(), 'maxbytes' : self.maxbytes }
+
+    ##################################################################################################
+    # @brief changes the maximum number of entries (and, if given, of bytes), evicting if needed
+    def resize(self, maxsize, maxbytes=None):
+        with self._lock:
+            self.maxsize = int(maxsize)
+            if maxbytes is not None:
+                self.maxbytes = maxbytes
+            self._trim()
+
+    #######################################################
+    # @brief drops all the entries and resets the counters
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits   = 0
+            self.misses = 0
+
+
+# geometry tables, memoized per (shape, redun, trueRedun) across all the megapix instances, within 256 MiB
+geometryCache = lruCache(16, 256 << 20)
 
-VERSION = 1.1
-DATE = '2017-08-30'
 
 class megapix:
     errMsg01 = 'megapix::__init__: invalid initialization parameters'
     errMsg02 = 'megapix::__init__: trueRedun should be in [1, redun]'
     errMsg03 = 'megapix::__init__: trueRedun should be an odd number'
+
+    # per-megapixel reductions available to method reduce
+    reductions = { 'mean'    : np.mean,    'sum'    : np.sum,    'min'    : np.min,    'max'    : np.max,
+                   'nanmean' : np.nanmean, 'nansum' : np.nansum, 'nanmin' : np.nanmin, 'nanmax' : np.nanmax }
     
     ########################################################################################################################
     # @brief Class constructor
     # @param dim               (int)                Specifies that the reference, "physical" image is a (dim x dim) image 
+    #                          (int, int)           or, for rectangular images, a (rows x cols) image
     # @param redun             (int)                defines a megapixel size of redun x redun physical pixels
     # @param trueRedun         (int)                specifies the region in which the physical pixel is replicated
     def __init__(self, dim, redun, trueRedun) :
+        try:
+            rows, cols = dim
+        except TypeError:
+            rows = cols = dim
         self.msg       = None
-        self.dim       = int(dim)
+        self.shape     = (int(rows), int(cols))
+        self.dim       = self.shape[0] if self.shape[0] == self.shape[1] else self.shape
         self.redun     = int(redun)
         self.trueRedun = int(trueRedun)
         self.megadim   = 0
+        self.megashape = (0, 0)
         
         if self.redun != 0 :
-            self.megadim  = self.dim / self.redun
+            self.megashape = (self.shape[0] // self.redun, self.shape[1] // self.redun)
+            if self.megashape[0] == 0 or self.megashape[1] == 0:
+                self.megadim   = 0
+                self.megashape = (0, 0)
+            elif self.dim == self.shape[0]:
+                self.megadim = self.megashape[0]
+            else:
+                self.megadim = self.megashape
         else:
             self.msg = self.errMsg01
             return
 
-        if self.dim < 1 or self.redun < 1 :
+        if min(self.shape) < 1 or self.redun < 1 :
             self.msg = self.errMsg01
-            self.megadim = 0
+            self.megadim   = 0
+            self.megashape = (0, 0)
             return
 
         if self.trueRedun < 1 or self.trueRedun > self.redun :
             self.msg = self.errMsg02
-            self.megadim = 0
+            self.megadim   = 0
+            self.megashape = (0, 0)
             return
         if self.trueRedun % 2 == 0:
             self.msg = self.errMsg03
-            self.megadim = 0
+            self.megadim   = 0
+            self.megashape = (0, 0)
             return
 #       
 #       if self.dim - self.megadim * self.redun != 0:
@@ -85,6 +306,19 @@ class megapix:
     # @return ditto
     def getMegadim(self):
         return self.megadim
+
+    #######################################################################
+    # @brief returns the (megarows, megacols) shape of the "logical" image
+    # @return ditto
+    def getMegashape(self):
+        return self.megashape
+
+    ########################################################################
+    # @brief returns the message reporting that no megapixel fits the image
+    # @param caller            (str)                name of the failing method
+    # @return ditto
+    def _fitMsg(self, caller):
+        return '%s: megapixel image ({%d}x{%d}) does not fit within image ({%d}x{%d})' % ((caller,) + self.megashape + self.shape)
     
     ##########################################################################################################
     # @brief returns the row and col of the physical pixel at the center of a specified megapixel
@@ -93,19 +327,19 @@ class megapix:
     # @return False on failure, otherwise the row and col of the physical pixel at the center of the megapixel
     def get(self, megarow, megacol):
         if self.megadim == 0:            
-            msg = 'get: megapixel image ({%d}x{%d}) does not fit within image ({%d}x{%d})' % (self.megadim,self.megadim, self.dim,self.dim) 
+            msg = self._fitMsg('get')
             if self.msg != None:
                 msg = msg + '\n\t(cf: ' + self.msg + ')'
             self.msg = msg     
             return False
-        if megarow < 0 or megarow >= self.megadim:
-            msg = 'get: input megarow (%d) should be in [0, %d[' % (megarow, self.megadim)
+        if megarow < 0 or megarow >= self.megashape[0]:
+            msg = 'get: input megarow (%d) should be in [0, %d[' % (megarow, self.megashape[0])
             if self.msg != None:
                 msg = msg + '\n\t(cf: ' + self.msg + ')'
             self.msg = msg
             return False
-        if megacol < 0 or megacol >= self.megadim:
-            msg = 'get: input megacol (%d) should be in [0, %d[' % (megacol, self.megadim)
+        if megacol < 0 or megacol >= self.megashape[1]:
+            msg = 'get: input megacol (%d) should be in [0, %d[' % (megacol, self.megashape[1])
             if self.msg != None:
                 msg = msg + '\n\t(cf: ' + self.msg + ')'
             self.msg = msg
@@ -114,6 +348,41 @@ class megapix:
         c = megacol * self.redun + self.displace
         return [r, c]
     
+    #################################################################################################################
+    # @brief vectorized get: returns the centers of arbitrary arrays of megapixels, validated all at once
+    # @details Unlike get, invalid coordinates do not touch the error message: they are only flagged in the validity
+    #          mask (and their centers set to -1). A description of each failure is built only if report is True.
+    # @param megarows          (int array)          rows    of the megapixels
+    # @param megacols          (int array)          columns of the megapixels (broadcast against megarows)
+    # @param report            (bool)               whether to return the list of failures too
+    # @return False on failure, otherwise [ rows, cols, valid ] (plus, if report, a list of
+    #         (index, megarow, megacol, reason) tuples, one per invalid megapixel, index being a tuple)
+    def getMany(self, megarows, megacols, report=False):
+        if self.megadim == 0:
+            self.msg = self._fitMsg('getMany')
+            return False
+        megarows, megacols = np.broadcast_arrays(np.asarray(megarows), np.asarray(megacols))
+        if megarows.dtype.kind not in 'iu' or megacols.dtype.kind not in 'iu':
+            self.msg = 'getMany: megarows and megacols should be integer arrays (got %s, %s)' % (megarows.dtype, megacols.dtype)
+            return False
+        rowOk = (megarows >= 0) & (megarows < self.megashape[0])
+        colOk = (megacols >= 0) & (megacols < self.megashape[1])
+        valid = rowOk & colOk
+        rows  = np.where(valid, megarows * self.redun + self.displace, -1)
+        cols  = np.where(valid, megacols * self.redun + self.displace, -1)
+        if not report:
+            return [ rows, cols, valid ]
+
+        failures = []
+        for index in zip(*np.nonzero(~valid)):
+            reasons = []
+            if not rowOk[index]:
+                reasons.append('megarow should be in [0, %d[' % self.megashape[0])
+            if not colOk[index]:
+                reasons.append('megacol should be in [0, %d[' % self.megashape[1])
+            failures.append((tuple(int(i) for i in index), int(megarows[index]), int(megacols[index]), '; '.join(reasons)))
+        return [ rows, cols, valid, failures ]
+
     #################################################################################################################
     # @brief returns a list of (row, col) couples of all the physical pixels corresponding to the mentioned megapixel 
     # @param megarow           (int)                row    of a megapixel 
@@ -128,11 +397,349 @@ class megapix:
         i = 0
         for rr in range(r - self.displace, r + self.displace + 1):
             for cc in range(c - self.displace, c + self.displace + 1):
-                if Verba:   print 'cells[{2}] = [{0},{1}]'.format(rr,cc,i)
+                if Verba:   print('cells[{2}] = [{0},{1}]'.format(rr,cc,i))
                 self.cells[i] = [ rr, cc ]
                 i = i + 1
         return self.cells
 
+    #################################################################################################################
+    # @brief returns the read-only geometry tables of this configuration (offsets, centers, labels, pixels, ...)
+    # @details The tables are memoized in geometryCache, shared by all the instances with the same geometry;
+    #          geometryCache.info() reports the cache hits and misses.
+    # @return False on failure, otherwise a megageometry object
+    def getGeometry(self):
+        if self.megadim == 0:
+            self.msg = self._fitMsg('getGeometry')
+            return False
+        return geometryCache.get((self.shape, self.redun, self.trueRedun), megageometry)
+
+    #################################################################################################################
+    # @brief returns the physical pixels of a megapixel as a read-only table (unlike getRowCol, no list is reused)
+    # @details Only the window of the megapixel is computed: the whole-image tables are not built.
+    # @param megarow           (int)                row    of a megapixel 
+    # @param megacol           (int)                column of a megapixel
+    # @return False on failure, otherwise a read-only (trueRedun * trueRedun, 2) array of [ row , col ] couples
+    def getCells(self, megarow, megacol):
+        center = self.get(megarow, megacol)
+        if not center:
+            self.msg = 'getCells: get failed (%s)' % (self.msg)
+            return False
+        d = np.arange(self.trueRedun) - self.displace
+        offsets = np.stack(np.meshgrid(d, d, indexing='ij'), axis=-1).reshape(-1, 2)
+        return _readOnly((np.array(center) + offsets).astype(np.intp))
+
+    #################################################################################################################
+    # @brief returns the 4-D strided view of the first megarows x megacols megapixels of an image (no checks)
+    # @param image             (ndarray)            an image holding at least the requested megapixels
+    # @param megarows          (int)                number of megapixel rows    in the view
+    # @param megacols          (int)                number of megapixel columns in the view
+    # @return ditto
+    def _view(self, image, megarows, megacols):
+        s0, s1  = image.strides
+        shape   = (megarows, megacols, self.trueRedun, self.trueRedun)
+        strides = (s0 * self.redun, s1 * self.redun, s0, s1)
+        return np.lib.stride_tricks.as_strided(image, shape=shape, strides=strides)
+
+    #################################################################################################################
+    # @brief builds, in one vectorized pass, the full-grid translation from megapixels to physical pixels
+    # @details Megapixels are numbered in row-major order, id = megarow * megacols + megacol.
+    #          rows and cols hold trueRedun * trueRedun entries per megapixel, grouped by id and listed in the same
+    #          order as getRowCol, so that the pixels of megapixel k are rows[k*t*t:(k+1)*t*t], cols[k*t*t:(k+1)*t*t]
+    #          (t = trueRedun). A whole image can then be gathered with image[rows, cols] or scattered with
+    #          image[rows, cols] = values. The arrays are read-only and shared through geometryCache.
+    # @return False on failure, otherwise [ labels, rows, cols ], where labels is an int32 map, shaped as the image, holding
+    #         the megapixel id of each physical pixel (-1 for pixels outside any trueRedun window)
+    def getIndexMap(self):
+        geometry = self.getGeometry()
+        if geometry is False:
+            self.msg = 'getIndexMap: getGeometry failed (%s)' % (self.msg)
+            return False
+        return [ geometry.labels, geometry.rows, geometry.cols ]
+
+    #################################################################################################################
+    # @brief returns a zero-copy view of an image, arranged by megapixel
+    # @details The view has shape (megarows, megacols, trueRedun, trueRedun): view[i, j] is the trueRedun x trueRedun
+    #          window of megapixel (i, j), i.e. the pixels returned by getRowCol(i, j). Windows never overlap, so
+    #          writing through the view updates the image in place.
+    # @param image             (ndarray)            an image of the physical shape
+    # @return False on failure, otherwise the 4-D strided view
+    def getView(self, image):
+        if self.megadim == 0:
+            self.msg = self._fitMsg('getView')
+            return False
+        image = np.asarray(image)
+        if image.shape != self.shape:
+            self.msg = 'getView: input image has shape %s, expected %s' % (image.shape, self.shape)
+            return False
+        return self._view(image, self.megashape[0], self.megashape[1])
+
+    #################################################################################################################
+    # @brief resolves a reduction, given by name or as a callable
+    # @param op                (str)                one of the keys of megapix.reductions, or
+    #                          (callable)           a function f(view, axis=(2, 3)) such as functools.partial(np.percentile, q=90)
+    # @param caller            (str)                name of the calling method, for error reporting
+    # @return None on failure, otherwise the reduction function
+    def _reduction(self, op, caller):
+        if callable(op):
+            return op
+        if op not in self.reductions:
+            self.msg = '%s: unknown reduction \'%s\' (available: %s)' % (caller, op, ', '.join(sorted(self.reductions)))
+            return None
+        return self.reductions[op]
+
+    #################################################################################################################
+    # @brief reduces each megapixel window of an image to a single value, without copying the image
+    # @details With workers > 1 the megapixel grid is split into blocks of megapixel rows that are reduced on a process
+    #          pool: the image is copied once into shared memory and each worker writes its rows of the result into a
+    #          shared output array. Every megapixel is reduced by the same code on the same data as in the serial
+    #          path, hence the results are identical. Requires Python >= 3.8, otherwise the serial path is used.
+    # @param image             (ndarray)            an image of the physical shape
+    # @param op                (str)                one of the keys of megapix.reductions ('mean', 'nanmax', ...), or
+    #                          (callable)           a function f(view, axis=(2, 3)); it must be picklable when workers > 1
+    # @param out               (ndarray)            optional output buffer, shaped as the megapixel image
+    # @param workers           (int)                number of worker processes (None: one per CPU)
+    # @param blockRows         (int)                megapixel rows per task (default: about 4 tasks per worker)
+    # @return False on failure, otherwise an array shaped as the megapixel image
+    def reduce(self, image, op='mean', out=None, workers=1, blockRows=None):
+        reduction = self._reduction(op, 'reduce')
+        if reduction is None:
+            return False
+        view = self.getView(image)
+        if view is False:
+            self.msg = 'reduce: getView failed (%s)' % (self.msg)
+            return False
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers > 1 and self.megashape[0] > 1 and shared_memory is not None:
+            return self._parallelReduce(np.asarray(image), reduction, out, workers, blockRows)
+        if out is None:
+            return reduction(view, axis=(2, 3))
+        if op in self.reductions:
+            return reduction(view, axis=(2, 3), out=out)
+        out[...] = reduction(view, axis=(2, 3))
+        return out
+
+    ##########################################################
+    # @brief process-pool path of reduce (arguments checked)
+    def _parallelReduce(self, image, reduction, out, workers, blockRows):
+        mh, mw = self.megashape
+        dtype  = np.asarray(reduction(self._view(image, 1, 1), axis=(2, 3))).dtype
+        if blockRows is None:
+            blockRows = -(-mh // (4 * workers))
+        blockRows = max(1, int(blockRows))
+        blocks    = [ (m0, min(m0 + blockRows, mh)) for m0 in range(0, mh, blockRows) ]
+
+        src = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        dst = shared_memory.SharedMemory(create=True, size=max(1, mh * mw * dtype.itemsize))
+        try:
+            shared = np.ndarray(image.shape, dtype=image.dtype, buffer=src.buf)
+            shared[...] = image
+            del shared
+            geometry = (self.shape, self.redun, self.trueRedun)
+            tasks = [ (src.name, image.dtype.str, dst.name, dtype.str, geometry, reduction, m0, m1) for m0, m1 in blocks ]
+            pool  = multiprocessing.Pool(min(workers, len(tasks)))
+            try:
+                pool.map(_reduceBlock, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+            result = np.ndarray((mh, mw), dtype=dtype, buffer=dst.buf)
+            if out is None:
+                out = result.copy()
+            else:
+                out[...] = result
+            del result
+        finally:
+            src.close()
+            src.unlink()
+            dst.close()
+            dst.unlink()
+        return out
+
+    #################################################################################################################
+    # @brief writes one value per megapixel back into a physical image (the inverse of reduce)
+    # @details Each value is replicated over the trueRedun x trueRedun window of its megapixel with a single
+    #          broadcasting assignment; the remaining (gap) pixels are set to fill.
+    # @param values            (ndarray)            an array shaped as the megapixel image
+    # @param out               (ndarray)            optional output buffer of the physical shape, reused across frames
+    # @param fill              (scalar)             value of the gap pixels; None leaves the gap pixels of out untouched
+    # @return False on failure, otherwise the physical image (out, if specified)
+    def upsample(self, values, out=None, fill=0):
+        values = np.asarray(values)
+        if values.shape != self.megashape:
+            self.msg = 'upsample: input values have shape %s, expected %s' % (values.shape, self.megashape)
+            return False
+        if out is None:
+            out = np.empty(self.shape, dtype=values.dtype)
+            if fill is None:
+                fill = 0
+        view = self.getView(out)
+        if view is False:
+            self.msg = 'upsample: getView failed (%s)' % (self.msg)
+            return False
+        view[...] = values[:, :, None, None]
+        if fill is not None:
+            geometry = self.getGeometry()
+            out[geometry.gapRows, :] = fill
+            out[:, geometry.gapCols] = fill
+        return out
+
+    #################################################################################################################
+    # @brief reduces an image band by band, e.g. a memory-mapped raster larger than RAM (cf. openRaster)
+    # @details The image is walked in bands of whole megapixel rows; only the physical rows of the current band are
+    #          touched, so that the working set is bounded by the band size.
+    # @param image             (ndarray)            an image (or np.memmap) of the physical shape
+    # @param op                (str)                one of the keys of megapix.reductions, or a callable (cf. reduce)
+    # @param bandRows          (int)                number of megapixel rows per band; by default derived from bandBytes
+    # @param bandBytes         (int)                approximate size in bytes of each band
+    # @return False on failure, otherwise a generator of [ megarow, block ] couples, where block holds the reductions
+    #         of megapixel rows [megarow, megarow + len(block)[
+    def iterReduce(self, image, op='mean', bandRows=None, bandBytes=64 << 20):
+        reduction = self._reduction(op, 'iterReduce')
+        if reduction is None:
+            return False
+        if self.megadim == 0:
+            self.msg = self._fitMsg('iterReduce')
+            return False
+        if not isinstance(image, np.ndarray):
+            image = np.asarray(image)
+        if image.shape != self.shape:
+            self.msg = 'iterReduce: input image has shape %s, expected %s' % (image.shape, self.shape)
+            return False
+        if bandRows is None:
+            bandRows = bandBytes // (self.redun * self.shape[1] * image.itemsize)
+        bandRows = max(1, int(bandRows))
+        return self._iterReduce(image, reduction, bandRows)
+
+    ##########################################################
+    # @brief generator behind iterReduce (arguments checked)
+    def _iterReduce(self, image, reduction, bandRows):
+        mh, mw = self.megashape
+        for m0 in range(0, mh, bandRows):
+            m1   = min(m0 + bandRows, mh)
+            band = image[m0 * self.redun : (m1 - 1) * self.redun + self.trueRedun]
+            yield [ m0, reduction(self._view(band, m1 - m0, mw), axis=(2, 3)) ]
+
+
+class megapixFlat(object):
+    ########################################################################################################################
+    # @brief compact variant of megapix: integer-only state in __slots__ and flat linear indices (row * cols + col)
+    #        instead of [ row, col ] couples, ready for image.ravel()[indices] or np.take(image, indices)
+    # @param dim               (int)                the physical image is a (dim x dim) image
+    #                          (int, int)           or a (rows x cols) image
+    # @param redun             (int)                defines a megapixel size of redun x redun physical pixels
+    # @param trueRedun         (int)                specifies the region in which the physical pixel is replicated
+    __slots__ = ('msg', 'shape', 'megashape', 'redun', 'trueRedun', 'displace')
+
+    def __init__(self, dim, redun, trueRedun):
+        mp = megapix(dim, redun, trueRedun)
+        self.msg       = mp.msg
+        self.shape     = mp.shape
+        self.megashape = mp.megashape
+        self.redun     = mp.redun
+        self.trueRedun = mp.trueRedun
+        self.displace  = self.trueRedun // 2
+
+    ##########################################
+    # @brief returns the latest error messages
+    # @return ditto
+    def getErr(self):
+        return self.msg
+
+    #######################################################################
+    # @brief returns the (megarows, megacols) shape of the "logical" image
+    # @return ditto
+    def getMegashape(self):
+        return self.megashape
+
+    #################################################################################################################
+    # @brief returns the read-only geometry tables of this configuration (shared with megapix through geometryCache)
+    # @return False on failure, otherwise a megageometry object
+    def getGeometry(self):
+        if self.megashape[0] == 0:
+            self.msg = 'getGeometry: megapixel image ({%d}x{%d}) does not fit within image ({%d}x{%d})' % (self.megashape + self.shape)
+            return False
+        return geometryCache.get((self.shape, self.redun, self.trueRedun), megageometry)
+
+    ##########################################################################################################
+    # @brief returns the flat index of the physical pixel at the center of a specified megapixel
+    # @param megarow           (int)                row    of a megapixel 
+    # @param megacol           (int)                column of a megapixel
+    # @return None on failure (not False, which would compare equal to the valid index 0), otherwise the flat index
+    #         of the center
+    def getIndex(self, megarow, megacol):
+        if not (0 <= megarow < self.megashape[0] and 0 <= megacol < self.megashape[1]):
+            self.msg = 'getIndex: megapixel (%d, %d) should be in [0, %d[ x [0, %d[' % ((megarow, megacol) + self.megashape)
+            return None
+        return (megarow * self.redun + self.displace) * self.shape[1] + megacol * self.redun + self.displace
+
+    #################################################################################################################
+    # @brief returns the flat indices of all the physical pixels corresponding to the mentioned megapixel
+    # @param megarow           (int)                row    of a megapixel 
+    # @param megacol           (int)                column of a megapixel
+    # @details Only the trueRedun * trueRedun offsets are computed: the whole-image tables are not built.
+    # @return False on failure, otherwise a read-only int32 (int64 for huge images) array of trueRedun * trueRedun indices
+    def getIndices(self, megarow, megacol):
+        center = self.getIndex(megarow, megacol)
+        if center is None:
+            self.msg = self.msg.replace('getIndex:', 'getIndices:', 1)
+            return False
+        indexType = np.int32 if self.shape[0] * self.shape[1] <= np.iinfo(np.int32).max else np.int64
+        d = np.arange(self.trueRedun, dtype=indexType) - self.displace
+        return _readOnly((center + d[:, None] * self.shape[1] + d[None, :]).ravel().astype(indexType))
+
+    #################################################################################################################
+    # @brief returns the flat indices of the pixels of all the megapixels, grouped by megapixel
+    # @details The pixels of megapixel k (k = megarow * megacols + megacol) are indices[k*t*t:(k+1)*t*t], t = trueRedun;
+    #          image.ravel()[indices].reshape(megarows, megacols, -1) gathers a whole image at once.
+    # @return False on failure, otherwise a read-only int32 (int64 for huge images) array
+    def getIndexMap(self):
+        geometry = self.getGeometry()
+        if geometry is False:
+            return False
+        return geometry.linear.ravel()
+
+    #################################################################################################################
+    # @brief returns the flat int32 label map: the megapixel id of each physical pixel, -1 outside any trueRedun window
+    # @return False on failure, otherwise a read-only array of rows * cols labels
+    def getLabels(self):
+        geometry = self.getGeometry()
+        if geometry is False:
+            return False
+        return geometry.labels.ravel()
+
+
+#################################################################################################################
+# @brief worker of megapix.reduce: reduces megapixel rows [m0, m1[ of a shared image into a shared result
+# @param task              (tuple)              (srcName, srcType, dstName, dstType, geometry, reduction, m0, m1)
+def _reduceBlock(task):
+    srcName, srcType, dstName, dstType, geometry, reduction, m0, m1 = task
+    src = shared_memory.SharedMemory(name=srcName)
+    dst = shared_memory.SharedMemory(name=dstName)
+    try:
+        mp     = megapix(*geometry)
+        image  = np.ndarray(mp.shape, dtype=srcType, buffer=src.buf)
+        result = np.ndarray(mp.megashape, dtype=dstType, buffer=dst.buf)
+        band   = image[m0 * mp.redun : (m1 - 1) * mp.redun + mp.trueRedun]
+        result[m0:m1] = reduction(mp._view(band, m1 - m0, mp.megashape[1]), axis=(2, 3))
+        del image, result, band
+    finally:
+        src.close()
+        dst.close()
+
+
+#################################################################################################################
+# @brief opens a raster file as a read-only memory map
+# @param path              (str)                a .npy file, or a raw file of row-major pixels
+# @param shape             (int, int)           (rows, cols) of a raw file; ignored for .npy files
+# @param dtype             (dtype)              pixel type of a raw file; ignored for .npy files
+# @param offset            (int)                header size in bytes of a raw file
+# @return a read-only np.memmap (IOError / ValueError are raised as by numpy)
+def openRaster(path, shape=None, dtype=np.float32, offset=0):
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
 
 def Red(prt): return "\033[91m%s\033[00m" % (prt)
 def Green(prt): return "\033[92m%s\033[00m" % (prt)
@@ -143,6 +750,81 @@ def Cyan(prt): return "\033[96m%s\033[00m" % (prt)
 def LightGray(prt): return "\033[97m%s\033[00m" % (prt)
 def Black(prt): return "\033[98m%s\033[00m" % (prt)
 
+#################################################################################################################
+# @brief indexes the values of a label map into a lookup table
+# @details Label maps hold a dense range of ids, so the table is the range [min, max] and the index is a subtraction;
+#          np.unique (a sort) is only used for sparse labels.
+# @param labels            (int ndarray)        a label map
+# @return [ values, index ], such that values[index] == labels
+def _labelIndex(labels):
+    if labels.size == 0:
+        return [ np.zeros(0, dtype=labels.dtype), np.zeros(labels.shape, dtype=np.intp) ]
+    lo = int(labels.min())
+    hi = int(labels.max())
+    if hi - lo < 2 * labels.size:
+        return [ np.arange(lo, hi + 1), labels - lo ]
+    values, inverse = np.unique(labels, return_inverse=True)
+    return [ values, inverse.reshape(labels.shape) ]
+
+#################################################################################################################
+# @brief renders a label map as text, in bulk, with a single write
+# @details Each distinct label is formatted once; cells are right-justified to a common width (at least 2, because of
+#          "-1") and followed by two spaces, as in the test program. All labels but -1 are wrapped by color.
+# @param labels            (int ndarray)        a 2-D label map (e.g. from getIndexMap)
+# @param stream            (file)               output stream (default: sys.stdout)
+# @param color             (callable)           ANSI wrapper such as Red, Green, ...; None for plain text
+# @return the number of characters written
+def renderLabels(labels, stream=None, color=Red):
+    labels = np.asarray(labels)
+    if stream is None:
+        stream = sys.stdout
+    values, index = _labelIndex(labels)
+    width = max([2] + [ len(str(v)) for v in (values[0], values[-1]) ]) if values.size else 2
+    table = [ str(v).rjust(width) for v in values.tolist() ]
+    if color is not None:
+        table = [ t if v == -1 else color(t) for v, t in zip(values.tolist(), table) ]
+    cells = np.array(table, dtype=object)[index]
+    text  = ''.join([ '  '.join(row) + '  \n' for row in cells.tolist() ])
+    stream.write(text)
+    return len(text)
+
+#################################################################################################################
+# @brief maps a label map to RGB colors: a distinct pseudo-random color per label, black for -1
+# @param labels            (int ndarray)        a 2-D label map
+# @return a (rows, cols, 3) uint8 array
+def labelColors(labels):
+    values, index = _labelIndex(np.asarray(labels))
+    h       = (values.astype(np.int64).astype(np.uint64) + np.uint64(1)) * np.uint64(2654435761)
+    palette = np.stack([ (h >> np.uint64(s)) & np.uint64(255) for s in (0, 8, 16) ], axis=-1).astype(np.uint8)
+    palette |= 64                    # keep labelled pixels away from black
+    palette[values == -1] = 0
+    return palette[index]
+
+#################################################################################################################
+# @brief writes a label map as a color image, without going through text
+# @param labels            (int ndarray)        a 2-D label map
+# @param path              (str)                output file; a name ending in .ppm selects a binary PPM, otherwise PNG
+# @param scale             (int)                each label is drawn as a (scale x scale) block
+# @return ditto path (IOError / OSError are raised as by open)
+def writeLabelImage(labels, path, scale=1):
+    rgb = labelColors(labels)
+    if scale > 1:
+        rgb = np.repeat(np.repeat(rgb, scale, axis=0), scale, axis=1)
+    rows, cols = rgb.shape[:2]
+    if path.lower().endswith('.ppm'):
+        data = ('P6\n%d %d\n255\n' % (cols, rows)).encode('ascii') + rgb.tobytes()
+    else:
+        raw  = np.zeros((rows, 1 + 3 * cols), dtype=np.uint8)         # filter type 0 in front of each scanline
+        raw[:, 1:] = rgb.reshape(rows, -1)
+        data = b'\x89PNG\r\n\x1a\n' + _pngChunk(b'IHDR', struct.pack('>IIBBBBB', cols, rows, 8, 2, 0, 0, 0)) \
+             + _pngChunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + _pngChunk(b'IEND', b'')
+    with open(path, 'wb') as g:
+        g.write(data)
+    return path
+
+def _pngChunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
 #****************************************************************************
 ## Main entry point
 #
@@ -150,45 +832,25 @@ if __name__ == "__main__":
 
     # from termcolor import colored
 
-    print 'Test program for class megapixel'
+    print('Test program for class megapixel')
     dim       = int(raw_input("Please enter the image dimension: "))
     redun     = int(raw_input("Please enter the mask dimension: "))
     trueRedun = int(raw_input("Please enter the true mask dimension: "))
     mp = megapix(dim, redun, trueRedun)
     if mp.getErr() != None:
-        print 'Megapix failed and returned message "{0}"'.format(mp.getErr())
+        print('Megapix failed and returned message "{0}"'.format(mp.getErr()))
         sys.exit(-1)
     
-    array = np.empty([dim,dim], dtype='int')
-    array.fill(-1)
-
-    succ = 1
     megaDim = mp.getMegadim()
-    for i in range(megaDim):
-        for j in range(megaDim):
-            cells = mp.getRowCol(i, j)
-            if cells == False:
-                print 'Sorry, getRowCol failed'
-                sys.exit(-1)
-            for cell in cells:
-		r, c = cell
-                array[r][c] = succ
-            succ = succ + 1
-
-    rjustSize = len(str(succ-1))
-    if rjustSize == 1: rjustSize = 2	# because we use "-1" too, thus min size is 2
-
-    for i in range(dim):
-        for j in range(dim):
-          if array[i][j] != -1 :
-              #print '{0} '.format(colored(repr(array[i][j]).rjust(rjustSize)),'green'),
-              print '{0} '.format(Red(repr(array[i][j]).rjust(rjustSize)),'green'),
-          else :
-              print '{0} '.format(repr(-1).rjust(rjustSize)),
-          # print '{0} '.format(repr(array[i][j]).rjust(rjustSize)),
-        print ''
-
-    print 'Megapixel test program ends.'
+    succ = megaDim * megaDim + 1
+    array = mp.upsample(np.arange(1, succ, dtype='int').reshape(megaDim, megaDim), fill=-1)
+    if array is False:
+        print('Sorry, upsample failed')
+        sys.exit(-1)
+
+    renderLabels(array)
+
+    print('Megapixel test program ends.')
     sys.exit(0)
 
 '''
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+# plotTxtClient
+#
+# Usage:
+#  ./plotTxtClient [ -s socket ] { -i dataFile.txt }+  -o outputImage.png -x XLabel -T title -f From -t To -v ...
+#
+# Thin client of the plotTxtFiles server (plotTxtFiles -S socket). The plotTxtFiles options are sent to the server
+# listening on socket (default: $PLOTTXT_SOCKET, or /tmp/plotTxtFiles-<uid>.sock, where plotTxtFiles -S - listens)
+# and its output and exit status are relayed. When no server is running, the plot is rendered in-process by
+# plotTxtFiles.py, found next to this file.
+# Only standard modules are imported until the fallback is needed.
+#
+# Versions
+#  v1.0 (October 18, 2026)
+#
+
+from __future__ import print_function
+
+import json
+import os
+import runpy
+import socket
+import sys
+
+VERSION = 1.0
+DATE = '2026-10-18'
+
+#################################################################################################################
+# @brief returns the default socket path, which is also the one of a server started with plotTxtFiles -S -
+# @return ditto
+def defaultSocket():
+    return os.environ.get('PLOTTXT_SOCKET', '/tmp/plotTxtFiles-{0}.sock'.format(os.getuid()))
+
+#################################################################################################################
+# @brief sends a plot request to the server
+# @param path              (str)                socket path
+# @param args              (list)               plotTxtFiles options
+# @return None if no server is listening on path, otherwise the reply (a dictionary with status, stdout, stderr)
+def request(path, args):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except (IOError, OSError):
+            return None
+        f = sock.makefile('rwb')
+        f.write((json.dumps({ 'argv' : args, 'cwd' : os.getcwd() }) + '\n').encode('utf-8'))
+        f.flush()
+        line = f.readline()
+        f.close()
+    finally:
+        sock.close()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+#****************************************************************************
+## Main entry point
+#{
+if __name__ == '__main__' :
+
+    args = sys.argv[1:]
+    path = defaultSocket()
+    if len(args) >= 2 and args[0] == '-s':
+        path = args[1]
+        args = args[2:]
+
+    reply = request(path, args)
+    if reply is not None:
+        sys.stdout.write(reply['stdout'])
+        sys.stderr.write(reply['stderr'])
+        sys.exit(reply['status'])
+
+    # no server: render in-process
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plotTxtFiles.py')
+    sys.argv = [ script ] + args
+    runpy.run_path(script, run_name='__main__')
+#} end of main and file
@@ -3,51 +3,241 @@
 # plotTxtFiles
 #
 # Usage:
-#  ./plotTxtFiles { -i dataFile.txt }+  -o outputImage.png -x XLabel -T title -f From -t To -v
+#  ./plotTxtFiles { -i dataFile.txt }+  -o outputImage.png -x XLabel -T title -f From -t To -v -e [ -c cacheDir [ -C cacheLimit ] ] [ -w threads ] [ -B backend ]
+#  ./plotTxtFiles -b manifest.json|manifest.csv [ -j workers ] -x XLabel -T title -f From -t To -v -e [ -c cacheDir [ -C cacheLimit ] ]
+#  ./plotTxtFiles -S socket|- [ -m memoryLimit ]
+#  ./plotTxtFiles -F interval { -i dataFile.txt }+  -o outputImage.png -x XLabel -T title -f From -t To -v -e
 #
 # Plots various data files together. Output goes into outputImage.png. Title is specified via -T.
 # The abscissas label is specified via -x. Options -f From and -t To select lines [From:To+1] for printing.
+# Option -v prints the options, the count, NaN count, min, max and mean of each series, the time spent in each stage
+# (argument parsing, loading, parsing, statistics, drawing, saving) and the peak RSS.
+# Input files are read in chunks: lines before From are skipped without being decoded, reading stops after line To,
+# and the selected lines are parsed in bulk into NumPy arrays. Files are loaded concurrently by a pool of -w threads
+# (default: one per file, at most 8); the arrays keep the order of the -i options, hence their colors and styles.
+# With -c cacheDir, parsed inputs are stored in cacheDir as .npy sidecars keyed on path, size and modification time
+# (and From/To): later runs memory-map them instead of parsing text. Sidecars of modified files are replaced, and the
+# least recently used ones are evicted to keep cacheDir under -C cacheLimit megabytes (default 1024).
+# Long series are decimated before plotting: each is reduced to the minimum and maximum of one bucket of points per
+# horizontal pixel, which keeps peaks visible at a fraction of the drawing cost. Option -e plots every point instead.
+# Option -b renders all the plot jobs of a manifest in one run, on a pool of -j worker processes (default: one per CPU)
+# that reuse their figure from job to job. A JSON manifest holds a list of objects with keys "inputs" (list of files),
+# "output", and optionally "title", "xlabel", "from" and "to"; a CSV manifest has the same columns, with inputs
+# separated by ';'. Missing values default to the command line options. Failed jobs are reported one by one.
+# Option -S runs a plot server on a Unix domain socket: matplotlib stays loaded, one figure is reused, and parsed inputs
+# are kept in an in-memory LRU cache of at most -m memoryLimit megabytes (default 512). Requests carry the same options
+# as the command line; they are sent by plotTxtClient.py, which renders in-process when no server is running. With -S -
+# the server listens on the client's default socket: $PLOTTXT_SOCKET, or /tmp/plotTxtFiles-<uid>.sock.
+# Option -F follows growing input files: every interval seconds only the newly appended lines are parsed (each file's
+# byte offset is remembered), and when some were found the existing plot lines and axis limits are updated and the
+# image is saved again. Following ends on Ctrl-C, or when line To of every file has been read.
+# Option -B selects the plotting backend: matplotlib (default) or raster, which draws the markers, axes and text
+# directly into a NumPy image and writes the PNG with zlib, without importing matplotlib. Either way matplotlib is only
+# imported when a plot is actually drawn with it.
 #
 # Versions
 #  v1.0 (June 12, 2018)
+#  v1.1 (October 18, 2026)
 # 
 
+from __future__ import print_function
+
 import numpy as np
 import sys
 
-VERSION = 1.0
-DATE = '2018-06-12'
+VERSION = 1.1
+DATE = '2026-10-18'
 
 import os, sys
+import csv
+import glob
+import hashlib
+import json
+import errno
+import multiprocessing
+import re
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+import traceback
+import warnings
+import zlib
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer as timer
+try:
+    import socketserver
+except ImportError:                                     # Python 2
+    import SocketServer as socketserver
+try:
+    from StringIO import StringIO                       # Python 2: print writes byte strings
+except ImportError:
+    from io import StringIO
+try:
+    import resource
+except ImportError:                                     # Windows: no maxrss
+    resource = None
 import numpy as np
-import matplotlib as mpl
-mpl.use('Agg')
-import matplotlib.pyplot as plt
 
+plt = None                                              # matplotlib.pyplot, imported by pyplot() when first needed
+
+#################################################################################################################
+# @brief imports matplotlib (Agg backend) on first use, so that runs which fail early or use the raster backend do
+#        not pay for it
+# @return the matplotlib.pyplot module
+def pyplot():
+    global plt
+    if plt is None:
+        import matplotlib as mpl
+        mpl.use('Agg')
+        import matplotlib.pyplot as plt
+    return plt
+
+
+#################################################################################################################
+# @brief min/max decimation: splits a series into buckets and keeps, for each bucket, its minimum and its maximum
+# @details NaN values are ignored (a bucket of NaNs keeps one of them); the kept points retain their original abscissas.
+# @param y                 (ndarray)            the series
+# @param buckets           (int)                number of buckets (typically the plot width in pixels)
+# @return [ x, y[x] ], the abscissas and values of the kept points (the whole series if it is short enough)
+def decimate(y, buckets):
+    n = y.size
+    if buckets < 1 or n <= 2 * buckets:
+        return [ np.arange(n), y ]
+    size = -(-n // buckets)                             # points per bucket
+    full = n // size
+    idx  = []
+    for lo, hi in ((0, full * size), (full * size, n)):
+        if lo == hi:
+            continue
+        block = y[lo:hi].reshape(-1, min(size, hi - lo))
+        nans  = np.isnan(block)
+        base  = lo + np.arange(block.shape[0]) * block.shape[1]
+        idx.append(base + np.where(nans, np.inf, block).argmin(axis=1))
+        idx.append(base + np.where(nans, -np.inf, block).argmax(axis=1))
+    x = np.unique(np.concatenate(idx))
+    return [ x, y[x] ]
+
+#################################################################################################################
+# Per-stage timings, printed with -v. Stages load and parse are summed over the loader threads.
+
+STAGES = ( 'args', 'load', 'parse', 'stats', 'draw', 'save' )
+
+_times = {}                                             # seconds spent per stage since the last resetTimes()
+_timesLock = threading.Lock()
+_timesStart = timer()
+
+class timed(object):
+    #############################################################################################################
+    # @brief context manager adding the time spent in its block to a stage (thread safe)
+    # @param stage             (str)                one of STAGES
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = timer()
+        return self
+
+    def __exit__(self, *exc):
+        addTimes({ self.stage : timer() - self.t0 })
+        return False
 
-def plotnArrays(fds, fns, oFile, title, xlabel):
-    ps = [ 'rs', 'g^', 'bs', 'r^', 'gs', 'b^' ]
+#################################################################################################################
+# @brief adds times to the stages (e.g. those returned by the workers of a batch)
+def addTimes(times):
+    with _timesLock:
+        for stage, seconds in times.items():
+            _times[stage] = _times.get(stage, 0.0) + seconds
+
+def resetTimes():
+    global _timesStart
+    with _timesLock:
+        _times.clear()
+        _timesStart = timer()
+
+#################################################################################################################
+# @brief prints the time spent in each stage, the elapsed time since resetTimes() and the peak RSS
+def reportTimes():
+    with _timesLock:
+        times = dict(_times)
+    print('Timings:')
+    for stage in STAGES:
+        print('  {0:6s}: {1:9.4f} s'.format(stage, times.get(stage, 0.0)))
+    print('  {0:6s}: {1:9.4f} s'.format('total', timer() - _timesStart))
+    if resource is not None:
+        scale = 1 << 20 if sys.platform == 'darwin' else 1 << 10           # ru_maxrss: bytes on macOS, KiB elsewhere
+        rss      = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+        print('Peak RSS: {0:.1f} MiB{1}'.format(rss / 1048576.0,
+              ' (child processes: {0:.1f} MiB)'.format(children / 1048576.0) if children else ''))
+
+#################################################################################################################
+# @brief summary statistics of a series, computed in one pass over blocks small enough to stay in cache
+# @param y                 (ndarray)            the series
+# @param block             (int)                values per block
+# @return a dictionary { 'count', 'nans', 'min', 'max', 'mean' } (min, max and mean are NaN without a number)
+def seriesStats(y, block=1 << 16):
+    count, nans, total = y.size, 0, 0.0
+    lo, hi = np.inf, -np.inf
+    for start in range(0, count, block):
+        b   = y[start:start + block]
+        nan = np.isnan(b)
+        k   = int(np.count_nonzero(nan))
+        if k:
+            nans += k
+            b = b[~nan]
+            if b.size == 0:
+                continue
+        lo = min(lo, b.min())
+        hi = max(hi, b.max())
+        total += b.sum(dtype=np.float64)
+    n = count - nans
+    if n == 0:
+        return { 'count' : count, 'nans' : nans, 'min' : np.nan, 'max' : np.nan, 'mean' : np.nan }
+    return { 'count' : count, 'nans' : nans, 'min' : float(lo), 'max' : float(hi), 'mean' : total / n }
+
+#################################################################################################################
+# @brief axis limits of a set of series: [0, longest length] x [global min, global max] plus a border of 1/50 of the
+#        range (1 for a constant, [0, 1] without any number)
+# @param fds               (list)               the series
+# @param verbose           (bool)               whether to print the statistics of each series
+# @return [ lenX, Min, Max, the seriesStats of each series ]
+def axisLimits(fds, verbose=False):
+    with timed('stats'):
+        stats = [ seriesStats(fd) for fd in fds ]
+        lenX  = max([ fd.size for fd in fds ] + [ 0 ])
+        Min   = min([ st['min'] for st in stats if st['count'] > st['nans'] ] + [ np.inf ])
+        Max   = max([ st['max'] for st in stats if st['count'] > st['nans'] ] + [ -np.inf ])
+    if Min > Max:
+        Min, Max = 0.0, 1.0
+    sz = (Max - Min) / 50 if Max > Min else 1.0         # add extra border
+    if verbose:
+        for i, st in enumerate(stats):
+            print('Series {0}: {count} values, {nans} NaN, min {min:g}, max {max:g}, mean {mean:g}'.format(i, **st))
+    return [ lenX, Min - sz, Max + sz, stats ]
+
+styles = [ 'rs', 'g^', 'bs', 'r^', 'gs', 'b^' ]              # format strings of the plotted series
+
+def plotnArrays(fds, fns, oFile, title, xlabel, exact=False, verbose=False, fig=None):
+    pyplot()
+    ps = styles
     lps = len(ps)
 
     l=len(fds)
     # print 'plotting {0} arrays (output=\'{1}\')\n'.format(l,oFile)
-    lenX=fds[0].size
-    
-    minY = np.nanmin(fds[0])
-    maxY = np.nanmax(fds[0])
-    for i in range(1,l):
-        minZ = np.nanmin(fds[i])
-        maxZ = np.nanmax(fds[i])
-        Min = minY if minY < minZ else minZ
-        Max = maxZ if maxZ > maxY else maxY
-
-    sz=Max-Min # add extra border
-    sz=sz/50
-    Min -= sz
-    Max += sz
-    fig = plt.figure(figsize=(10,7))
+    lenX, Min, Max, stats = axisLimits(fds, verbose)
+
+    t0 = timer()
+    own = fig is None                                   # a figure passed by the caller is reused, not closed
+    if own:
+        fig = plt.figure(figsize=(10,7))
+    else:
+        plt.figure(fig.number)
     plt.subplot(111)
-    plt.axis([0, lenX, Min, Max])
+    plt.axis([0, max(lenX, 1), Min, Max])
     plt.xlabel(xlabel)
     plt.title(title)
 
@@ -61,12 +251,344 @@ def plotnArrays(fds, fns, oFile, title, xlabel):
     plt.plot(*tpl)
     '''
 
+    # one min/max bucket per horizontal pixel of the saved image
+    buckets = 0 if exact else int(fig.get_size_inches()[0] * fig.dpi)
     for i in range(l):
-        plt.plot(fds[i], ps[i % lps], label=str(i))
+        x, y = decimate(fds[i], buckets)
+        if verbose and not exact:
+            print('Series {0}: {1} -> {2} points (reduction ratio {3:.1f})'.format(i, fds[i].size, y.size, float(fds[i].size) / max(y.size, 1)))
+        plt.plot(x, y, ps[i % lps], label=str(i))
+    addTimes({ 'draw' : timer() - t0 })
 
-    plt.savefig(oFile)
+    with timed('save'):
+        plt.savefig(oFile)
     plt.clf()
-    plt.close(fig)
+    if own:
+        plt.close(fig)
+
+#################################################################################################################
+# Raster backend (option -B raster): the series are drawn directly into a NumPy RGB buffer of the size of the
+# matplotlib figure (1000 x 700 pixels), with the same axis limits, styles and decimation, and the image is written
+# as a PNG with zlib only. Text uses a 5x7 bitmap font (lower case letters are drawn as upper case ones).
+
+# glyphs: 7 rows of 5 bits, in hex
+_font = { '0' : '0e11131519110e', '1' : '040c040404040e', '2' : '0e11010204081f', '3' : '1f02040201110e',
+          '4' : '02060a121f0202', '5' : '1f101e0101110e', '6' : '0608101e11110e', '7' : '1f010204080808',
+          '8' : '0e11110e11110e', '9' : '0e11110f01020c', 'A' : '0e11111f111111', 'B' : '1e11111e11111e',
+          'C' : '0e11101010110e', 'D' : '1c12111111121c', 'E' : '1f10101e10101f', 'F' : '1f10101e101010',
+          'G' : '0e11101711110f', 'H' : '1111111f111111', 'I' : '0e04040404040e', 'J' : '0702020202120c',
+          'K' : '11121418141211', 'L' : '1010101010101f', 'M' : '111b1515111111', 'N' : '11111915131111',
+          'O' : '0e11111111110e', 'P' : '1e11111e101010', 'Q' : '0e11111115120d', 'R' : '1e11111e141211',
+          'S' : '0f10100e01011e', 'T' : '1f040404040404', 'U' : '1111111111110e', 'V' : '11111111110a04',
+          'W' : '1111111515150a', 'X' : '11110a040a1111', 'Y' : '11110a04040404', 'Z' : '1f01020408101f',
+          '.' : '00000000000c0c', ',' : '000000000c0408', '-' : '0000001f000000', '+' : '0004041f040400',
+          ':' : '000c0c000c0c00', '(' : '02040808080402', ')' : '08040202020408', '/' : '00010204081000',
+          '_' : '0000000000001f', '=' : '00001f001f0000', '%' : '18190204081303', '\'' : '04040800000000',
+          '?' : '0e110102040004', '[' : '0e08080808080e', ']' : '0e02020202020e', '!' : '04040404040004',
+          '*' : '0004150e150400', '#' : '0a0a1f0a1f0a0a' }
+_glyphs = None                                          # the glyphs as boolean arrays, decoded on first use
+
+_colors  = { 'r' : (255, 0, 0), 'g' : (0, 128, 0), 'b' : (0, 0, 255), 'c' : (0, 191, 191), 'm' : (191, 0, 191),
+             'y' : (191, 191, 0), 'k' : (0, 0, 0) }
+_markers = { 's' : [ (dy, dx) for dy in range(-4, 4) for dx in range(-4, 4) ],
+             '^' : [ (dy, dx) for dy in range(-4, 4) for dx in range(-4, 5) if 2 * abs(dx) <= dy + 4 ],
+             'o' : [ (dy, dx) for dy in range(-4, 5) for dx in range(-4, 5) if dy * dy + dx * dx <= 16 ],
+             '.' : [ (dy, dx) for dy in range(-1, 2) for dx in range(-1, 2) ] }
+
+#################################################################################################################
+# @brief renders a line of text into an image (clipped to the image)
+# @param img               (ndarray)            the (rows, cols, 3) uint8 image
+# @param text              (str)                the text (characters without a glyph are drawn as '?')
+# @param x, y              (int)                anchor point: horizontal center or right end (align), vertical center
+# @param scale             (int)                size of the pixels of a glyph
+# @param align             (str)                'center' or 'right'
+# @param color             (tuple)              RGB color of the text
+def drawText(img, text, x, y, scale=1, align='center', color=(0, 0, 0)):
+    global _glyphs
+    if _glyphs is None:
+        _glyphs = dict((c, np.array([ [ (int(h[2*r:2*r+2], 16) >> (4 - b)) & 1 for b in range(5) ] for r in range(7) ],
+                                    dtype=bool)) for c, h in _font.items())
+    text = str(text).upper()
+    if not text:
+        return
+    mask = np.zeros((7, 6 * len(text)), dtype=bool)
+    for i, c in enumerate(text):
+        if c != ' ':
+            mask[:, 6*i:6*i+5] = _glyphs.get(c, _glyphs['?'])
+    mask = mask[:, :-1]
+    if scale > 1:
+        mask = np.repeat(np.repeat(mask, scale, axis=0), scale, axis=1)
+    h, w = mask.shape
+    top  = y - h // 2
+    left = x - w // 2 if align == 'center' else x - w
+    r0, c0 = max(top, 0), max(left, 0)
+    r1, c1 = min(top + h, img.shape[0]), min(left + w, img.shape[1])
+    if r0 < r1 and c0 < c1:
+        img[r0:r1, c0:c1][mask[r0-top:r1-top, c0-left:c1-left]] = color
+
+#################################################################################################################
+# @brief about n round tick values (1, 2 or 5 times a power of ten) covering [lo, hi]
+# @return [ ticks, number of decimals needed to print them ]
+def niceTicks(lo, hi, n=7):
+    span = float(hi - lo)
+    if not span > 0:
+        return [ np.array([ lo ]), 0 ]
+    step = 10.0 ** np.floor(np.log10(span / n))
+    for m in (1, 2, 5, 10):
+        if span / (m * step) <= n:
+            step *= m
+            break
+    ticks = np.arange(np.ceil(lo / step), np.floor(hi / step) + 1) * step + 0.0      # no -0
+    return [ ticks, int(max(0, -np.floor(np.log10(step)))) ]
+
+#################################################################################################################
+# @brief writes an RGB image as a PNG file, with zlib only
+# @param rgb               (ndarray)            the (rows, cols, 3) uint8 image
+# @param path              (str)                the output file
+def writePng(rgb, path):
+    rows, cols = rgb.shape[:2]
+    raw = np.zeros((rows, 1 + 3 * cols), dtype=np.uint8)           # filter type 0 in front of each scanline
+    raw[:, 1:] = rgb.reshape(rows, -1)
+    chunk = lambda tag, data: struct.pack('>I', len(data)) + tag + data \
+                            + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+    with open(path, 'wb') as g:
+        g.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', cols, rows, 8, 2, 0, 0, 0))
+                + chunk(b'IDAT', zlib.compress(raw.tobytes(), 1)) + chunk(b'IEND', b''))
+
+#################################################################################################################
+# @brief plots arrays with the raster backend (same arguments and result as plotnArrays, without the figure)
+def rasterArrays(fds, fns, oFile, title, xlabel, exact=False, verbose=False, size=(700, 1000)):
+    lenX, Min, Max, stats = axisLimits(fds, verbose)
+    t0 = timer()
+    rows, cols = size
+    img = np.empty((rows, cols, 3), dtype=np.uint8)
+    img.fill(255)
+    top, bottom = int(round(0.12 * rows)), int(round(0.89 * rows))     # the axes box of a matplotlib subplot
+    left, right = int(round(0.125 * cols)), int(round(0.9 * cols))
+
+    X = lambda x: left + (np.asarray(x, dtype=float) / max(lenX, 1)) * (right - left)
+    Y = lambda y: bottom - (np.asarray(y, dtype=float) - Min) / (Max - Min) * (bottom - top)
+
+    buckets = 0 if exact else cols
+    for i in range(len(fds)):
+        x, y = decimate(fds[i], buckets)
+        if verbose and not exact:
+            print('Series {0}: {1} -> {2} points (reduction ratio {3:.1f})'.format(i, fds[i].size, y.size, float(fds[i].size) / max(y.size, 1)))
+        ok = ~np.isnan(y)
+        px = np.rint(X(x[ok])).astype(np.int64)
+        py = np.rint(Y(y[ok])).astype(np.int64)
+        at = np.unique(py * cols + px)                  # one stamp per distinct pixel
+        py, px = at // cols, at % cols
+        style = styles[i % len(styles)]
+        for dy, dx in _markers.get(style[1:], _markers['s']):
+            r, c = py + dy, px + dx
+            inside = (r >= top) & (r <= bottom) & (c >= left) & (c <= right)
+            img[r[inside], c[inside]] = _colors.get(style[0], _colors['k'])
+
+    black = (0, 0, 0)
+    img[top, left:right + 1] = img[bottom, left:right + 1] = black
+    img[top:bottom + 1, left] = img[top:bottom + 1, right] = black
+    ticks, decimals = niceTicks(0, lenX)
+    for t in ticks:
+        c = int(round(X(t)))
+        img[bottom + 1:bottom + 6, c] = black
+        drawText(img, '{0:.{1}f}'.format(t, decimals), c, bottom + 14)
+    ticks, decimals = niceTicks(Min, Max)
+    for t in ticks:
+        r = int(round(Y(t)))
+        img[r, left - 5:left] = black
+        drawText(img, '{0:.{1}f}'.format(t, decimals), left - 8, r, align='right')
+    drawText(img, xlabel, (left + right) // 2, bottom + 34)
+    drawText(img, title, (left + right) // 2, top - 20, scale=2)
+    addTimes({ 'draw' : timer() - t0 })
+    with timed('save'):
+        writePng(img, oFile)
+
+#################################################################################################################
+# @brief parses a buffer of n newline-terminated lines, one number per line, in bulk
+# @return a float array of n elements (ValueError is raised on malformed lines, as float() does)
+def parseLines(buf, n):
+    # np.fromstring treats any whitespace as a separator, so that '2 3' or an empty line would not be rejected:
+    # buffers with blank lines or with blanks (other than the '\r' of '\r\n') are parsed line by line
+    lines = buf.replace(b'\r\n', b'\n')
+    bulk = not (lines.startswith(b'\n') or b'\n\n' in lines or b' ' in lines or b'\t' in lines or b'\r' in lines)
+    with timed('parse'):
+        values = None
+        if bulk:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                try:
+                    values = np.fromstring(lines.decode('latin-1'), sep='\n')
+                except ValueError:
+                    pass
+        if values is None or values.size != n:
+            # malformed or blank-padded input: parse line by line, so that the offending line raises
+            values = np.array([ float(line.rstrip()) for line in buf.decode('latin-1').split('\n')[:n] ])
+    return values
+
+#################################################################################################
+# @brief returns the offset of the k-th (k >= 1) newline of a buffer holding at least k newlines
+# @return ditto
+def nthNewline(buf, k):
+    return int(np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == 10)[k - 1])
+
+#################################################################################################################
+# @brief loads the numbers (one per line) of lines [From:To+1] of a text file, or of the whole file if From == To == 0
+# @details The file is read in chunks of chunkSize bytes, so that files larger than RAM can be loaded: lines before
+#          From are only counted (their newlines are located with NumPy, without building Python strings), reading
+#          stops after line To, and the kept lines are parsed chunk by chunk with parseLines.
+# @param f                 (file)               a file opened in binary mode
+# @param From              (int)                first line
+# @param To                (int)                last line
+# @param chunkSize         (int)                bytes read at a time
+# @return a float array
+def loadTxt(f, From=0, To=0, chunkSize=1 << 24):
+    ranged = From != 0 or To != 0
+    if ranged and (From < 0 or To < 0):
+        # negative bounds are relative to the end of the file: keep the slicing semantics of readlines()[From:To+1]
+        with timed('load'):
+            lines = f.read().split(b'\n')
+        if lines[-1] == b'':
+            lines.pop()
+        lines = lines[From:To+1]
+        return parseLines(b'\n'.join(lines), len(lines))
+
+    skip = From if ranged else 0
+    keep = To + 1 - From if ranged else None
+    if keep is not None and keep <= 0:
+        return np.zeros(0)
+    parts = []                                      # per-chunk arrays: To may lie far beyond the end of the file
+    done  = 0
+    tail  = b''
+    while keep is None or done < keep:
+        with timed('load'):
+            chunk = f.read(chunkSize)
+        eof   = not chunk
+        data  = tail + chunk
+        if eof:
+            if not data:
+                break
+            data += b'\n'                           # last line without newline
+        n = data.count(b'\n')
+        if n == 0:
+            tail = data
+            continue
+        end  = data.rfind(b'\n')
+        tail = data[end + 1:]
+        if skip >= n:
+            skip -= n
+        else:
+            start = nthNewline(data, skip) + 1 if skip > 0 else 0
+            take  = n - skip
+            if keep is not None and take > keep - done:
+                take = keep - done
+                end  = nthNewline(data, skip + take)
+            parts.append(parseLines(data[start:end + 1], take))
+            done += take
+            skip  = 0
+        if eof:
+            break
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate(parts) if parts else np.zeros(0)
+
+#################################################################################################################
+# @brief loads lines [From:To+1] of a text file through a cache of .npy sidecars (cf. loadTxt)
+# @details The sidecar name combines a hash of the absolute path with a hash of the file size and modification time,
+#          plus From and To: a hit memory-maps the sidecar, a miss parses the text and saves it. Sidecars of older
+#          versions of the same file are removed, then the least recently used sidecars are evicted until the cache
+#          holds at most cacheLimit bytes. Cache errors are reported and otherwise ignored.
+# @param f                 (file)               the input file, opened in binary mode
+# @param fn                (str)                its path
+# @param From              (int)                first line
+# @param To                (int)                last line
+# @param cacheDir          (str)                cache directory (created if needed)
+# @param cacheLimit        (int)                maximum size of the cache in bytes
+# @param verbose           (bool)               whether to report hits and misses
+# @return a float array (read-only memory map on a hit)
+def cachedLoadTxt(f, fn, From, To, cacheDir, cacheLimit, verbose=False):
+    st = os.fstat(f.fileno())
+    pathKey  = hashlib.sha1(os.path.abspath(fn).encode('utf-8')).hexdigest()[:16]
+    stateKey = hashlib.sha1(('%d:%r' % (st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime))).encode('ascii')).hexdigest()[:16]
+    sidecar  = os.path.join(cacheDir, '%s-%s-%d-%d.npy' % (pathKey, stateKey, From, To))
+
+    if os.path.exists(sidecar):
+        try:
+            with timed('load'):
+                values = np.load(sidecar, mmap_mode='r')
+            os.utime(sidecar, None)                     # mark as recently used
+            if verbose:
+                sys.stdout.write('Cache hit : {0} ({1})\n'.format(fn, sidecar))     # one write: loader threads interleave
+            return values
+        except (IOError, OSError, ValueError):
+            pass                                        # unreadable sidecar: parse again and overwrite it
+
+    values = loadTxt(f, From, To)
+    try:
+        try:
+            os.makedirs(cacheDir)
+        except OSError as e:                            # another loader thread may have created it
+            if e.errno != errno.EEXIST or not os.path.isdir(cacheDir):
+                raise
+        for stale in listSidecars(cacheDir):
+            name = os.path.basename(stale)
+            if name.startswith(pathKey + '-') and not name.startswith('%s-%s-' % (pathKey, stateKey)):
+                try:
+                    os.remove(stale)
+                except OSError as e:                    # already removed by another loader thread
+                    if e.errno != errno.ENOENT:
+                        raise
+        # a unique temporary file: the same input may be loaded by several threads at once
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=cacheDir)
+        try:
+            with os.fdopen(fd, 'wb') as g:
+                np.save(g, values)
+            os.rename(tmp, sidecar)
+        except:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        pruneCache(cacheDir, cacheLimit, keep=sidecar)
+        if verbose:
+            sys.stdout.write('Cache miss: {0} ({1})\n'.format(fn, sidecar))
+    except (IOError, OSError) as e:
+        sys.stderr.write('Cache {0} could not be updated ({1})\n'.format(cacheDir, e))
+    return values
+
+_sidecarName = re.compile(r'^[0-9a-f]{16}-[0-9a-f]{16}--?[0-9]+--?[0-9]+\.npy$')
+
+#################################################################################################################
+# @brief lists the sidecars of a cache directory
+# @details Only files named as cachedLoadTxt names its sidecars (<16 hex>-<16 hex>-<From>-<To>.npy) are listed, so
+#          that other .npy files sharing the directory are never evicted.
+# @return a list of paths
+def listSidecars(cacheDir):
+    return [ path for path in glob.glob(os.path.join(cacheDir, '*.npy'))
+             if _sidecarName.match(os.path.basename(path)) ]
+
+#################################################################################################################
+# @brief evicts the least recently used sidecars of a cache directory until it holds at most cacheLimit bytes
+# @param keep              (str)                a sidecar never to evict
+def pruneCache(cacheDir, cacheLimit, keep=None):
+    entries = []
+    for path in listSidecars(cacheDir):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= cacheLimit:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
 
 def dumpArray(r, file):
     s=r.size
@@ -79,104 +601,597 @@ def dumpArray(r, file):
        return False
     return True
         
-#****************************************************************************
-## Main entry point
-#{
-if __name__ == '__main__' :
+#################################################################################################################
+# @brief returns the default socket path of the plot server (-S -), which is also the default of plotTxtClient.py
+# @return ditto
+def defaultSocket():
+    return os.environ.get('PLOTTXT_SOCKET', '/tmp/plotTxtFiles-{0}.sock'.format(os.getuid()))
 
-    argv = sys.argv
+#################################################################################################################
+# @brief parses the command line
+# @param argv              (list)               the command line, argv[0] being the program name
+# @return None on error (reported on stderr), otherwise a dictionary of options
+def parseArgs(argv):
+    opts = { 'fns' : [], 'oFile' : 'plotTxtFiles/output.png', 'From' : 0, 'To' : 0,
+             'title' : 'LAI vs SM (-0.2: val == 248)', 'xlabel' : 'days', 'verbose' : False, 'exact' : False,
+             'cacheDir' : None, 'cacheLimit' : 1024, 'manifest' : None, 'workers' : None,
+             'socket' : None, 'memoryLimit' : 512, 'threads' : None, 'follow' : None, 'backend' : 'matplotlib' }
     argc = len(argv)
-
-    if argc == 1:
-        sys.stderr.write('At least one file must be specified on the command line. Bailing out...\n')
-        sys.exit(-1)
-
-    # Now we know that we have args on the command line
-
-    oFile = 'plotTxtFiles/output.png'
-    From = 0
-    To = 0
-    err = False
-    title = 'LAI vs SM (-0.2: val == 248)'
-    xlabel = 'days'
-    verbose=False
-
     i = 1
-    fns = []
-    while i < argc :
-        arg = argv[i]
-        if len(arg) >= 2:
-            if arg[0] == '-':
+    try:
+        while i < argc :
+            arg = argv[i]
+            if len(arg) >= 2 and arg[0] == '-':
                 arg = arg[1:]
 
                 if arg == 'i':
                     i += 1
-                    fns.append(argv[i])
+                    opts['fns'].append(argv[i])
                 elif arg == 'o':
                     i += 1
-                    oFile = argv[i]
+                    opts['oFile'] = argv[i]
                 elif arg == 'x':
                     i += 1
-                    xlabel = argv[i]
+                    opts['xlabel'] = argv[i]
                 elif arg == 'f':
                     i += 1
-                    From = int(argv[i])
+                    opts['From'] = int(argv[i])
                 elif arg == 't':
                     i += 1
-                    To = int(argv[i])
+                    opts['To'] = int(argv[i])
                 elif arg == 'T':
                     i += 1
-                    title = argv[i]
+                    opts['title'] = argv[i]
                 elif arg == 'v':
-                    verbose=True
+                    opts['verbose'] = True
+                elif arg == 'e':
+                    opts['exact'] = True
+                elif arg == 'c':
+                    i += 1
+                    opts['cacheDir'] = argv[i]
+                elif arg == 'C':
+                    i += 1
+                    opts['cacheLimit'] = int(argv[i])
+                elif arg == 'b':
+                    i += 1
+                    opts['manifest'] = argv[i]
+                elif arg == 'j':
+                    i += 1
+                    opts['workers'] = int(argv[i])
+                elif arg == 'S':
+                    i += 1
+                    opts['socket'] = defaultSocket() if argv[i] == '-' else argv[i]
+                elif arg == 'm':
+                    i += 1
+                    opts['memoryLimit'] = int(argv[i])
+                elif arg == 'w':
+                    i += 1
+                    opts['threads'] = int(argv[i])
+                elif arg == 'F':
+                    i += 1
+                    opts['follow'] = float(argv[i])
+                elif arg == 'B':
+                    i += 1
+                    if argv[i] not in ('matplotlib', 'raster'):
+                        raise ValueError(argv[i])
+                    opts['backend'] = argv[i]
                 else:
                     sys.stderr.write('Erroneous argument caught: -{0}\n'.format(arg))
-                    err = True
-                    break
+                    return None
             else:
-                print arg
-                err = True
-                break
-        else:
-            print arg
-            err = True
-            break
-        i += 1
-
-    if err:
-        sys.stderr.write('Error in the commandline arguments. Bailing out...\n')
-        sys.exit(-1)
-
-    if verbose:
-        print 'Input files: {0}'.format(fns)
-        print 'Output file: {0}'.format(oFile)
-        print 'Title      : {0}'.format(title)
-        print 'xlabel     : {0}'.format(xlabel)
-        if From != 0 or To != 0:
-            print 'From: {0}'.format(From)
-            print 'To  : {0}'.format(To)
-
-    cwd = os.getcwd()
+                sys.stderr.write('Erroneous argument caught: {0}\n'.format(arg))
+                return None
+            i += 1
+    except IndexError:
+        sys.stderr.write('Missing value for option {0}\n'.format(argv[i - 1]))
+        return None
+    except ValueError:
+        sys.stderr.write('Invalid value for option {0}: {1}\n'.format(argv[i - 1], argv[i]))
+        return None
+    return opts
 
+#################################################################################################################
+# @brief loads lines [From:To+1] of a set of text files (cf. loadTxt and cachedLoadTxt)
+# @details All the files are opened before any is read, so that a missing file is reported without loading the others.
+#          With memCache, arrays are looked up by path, size, modification time and From/To before being loaded.
+#          Files are read and parsed concurrently by a pool of threads (default: one per file, at most 8); the
+#          returned arrays are in the order of fns.
+# @return a list of float arrays (IOError is raised if a file cannot be accessed)
+def loadFiles(fns, From, To, cacheDir=None, cacheLimit=1024, verbose=False, memCache=None, threads=None):
     fds = list(fns)
     l = len(fns)
     for i in range(l):
         try:
-            fds[i] = open(fns[i])
-        except:
-            sys.stderr.write('File {0} could not be accessed. Bailing out...\n'.format(fns[i]))
-            sys.exit(-1)
+            fds[i] = open(fns[i], 'rb')
+        except (IOError, OSError):
+            for f in fds[:i]:
+                f.close()
+            raise IOError('File {0} could not be accessed'.format(fns[i]))
 
     # Now we know that all the files in fns[] are open and their corresponding fd is in fds[]
 
-    for i in range(l):
-        lines = fds[i].readlines()
-        fds[i].close()
-        if From != 0 or To != 0:
-            lines = lines[From:To+1]
-        fds[i] = np.array ( [ float(line.rstrip()) for line in lines ] )
+    def load(i):
+        f = fds[i]
+        try:
+            key = None
+            if memCache is not None:
+                st  = os.fstat(f.fileno())
+                key = (os.path.abspath(fns[i]), st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime), From, To)
+                values = memCache.get(key)
+                if values is not None:
+                    return values
+            if cacheDir is not None:
+                values = cachedLoadTxt(f, fns[i], From, To, cacheDir, cacheLimit << 20, verbose)
+            else:
+                values = loadTxt(f, From, To)
+            if key is not None:
+                memCache.put(key, values)
+            return values
+        finally:
+            f.close()
+
+    if threads is None:
+        threads = min(8, l)
+    if threads <= 1 or l <= 1:
+        return [ load(i) for i in range(l) ]
+    pool = ThreadPool(min(threads, l))
+    try:
+        return pool.map(load, range(l), chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+class arrayCache(object):
+    #############################################################################################################
+    # @brief thread-safe, in-memory least-recently-used cache of arrays, bounded by their total size in bytes
+    # @param maxBytes          (int)                maximum total size (the latest array is always kept)
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.size     = 0
+        self.hits     = 0
+        self.misses   = 0
+        self._items   = OrderedDict()
+        self._lock    = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            values = self._items.pop(key, None)
+            if values is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items[key] = values
+            return values
+
+    def put(self, key, values):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old.nbytes
+            self._items[key] = values
+            self.size += values.nbytes
+            while self.size > self.maxBytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= evicted.nbytes
+
+#################################################################################################################
+# @brief returns a value of a manifest entry, or the command line default when the entry leaves it out
+# @param entry             (dict)               a manifest entry
+# @param key               (str)                the key of the value
+# @param default           (any)                the command line value
+# @return entry[key], or default when the key is missing, None or '' (so that an explicit 0 is kept)
+def entryValue(entry, key, default):
+    value = entry.get(key)
+    if value is None or value == '':
+        return default
+    return value
+
+#################################################################################################################
+# @brief reads a manifest of plot jobs
+# @param manifest          (str)                a .json file (list of objects, or object with a "jobs" list) or a
+#                                               .csv file with a header line
+# @param opts              (dict)               command line options, providing the defaults of missing values
+# @return a list of jobs, each a dictionary with keys fns, oFile, title, xlabel, From, To (IOError / ValueError are
+#         raised on unreadable or malformed manifests)
+def readManifest(manifest, opts):
+    with open(manifest) as f:
+        if manifest.lower().endswith('.csv'):
+            entries = list(csv.DictReader(f))
+        else:
+            entries = json.load(f)
+            if isinstance(entries, dict):
+                entries = entries['jobs']
+    jobs = []
+    for entry in entries:
+        inputs = entry.get('inputs') or entry.get('input') or []
+        if not isinstance(inputs, list):
+            inputs = [ fn.strip() for fn in inputs.split(';') if fn.strip() ]
+        jobs.append({ 'fns'    : inputs,
+                      'oFile'  : entryValue(entry, 'output', opts['oFile']),
+                      'title'  : entryValue(entry, 'title',  opts['title']),
+                      'xlabel' : entryValue(entry, 'xlabel', opts['xlabel']),
+                      'From'   : int(entryValue(entry, 'from', opts['From'])),
+                      'To'     : int(entryValue(entry, 'to',   opts['To'])) })
+    return jobs
+
+_figure = None                                          # figure reused by the jobs of a batch worker
+_jobOpts = None                                         # command line options of a batch worker
+
+def _initWorker(opts, fig=None):
+    global _figure, _jobOpts
+    if opts['backend'] != 'raster':
+        _figure = fig if fig is not None else pyplot().figure(figsize=(10,7))
+    _jobOpts = opts
+
+#################################################################################################################
+# @brief renders one job of a batch with the worker's figure
+# @param task              (tuple)              (index, job)
+# @return (index, output file, None on success or an error message, seconds spent per stage)
+def runJob(task):
+    index, job = task
+    opts = _jobOpts
+    before = dict(_times)
+    error = None
+    try:
+        if not job['fns']:
+            raise ValueError('no input files')
+        fds = loadFiles(job['fns'], job['From'], job['To'], opts['cacheDir'], opts['cacheLimit'], opts['verbose'],
+                        threads=opts['threads'])
+        plot(fds, job['fns'], job['oFile'], job['title'], job['xlabel'], opts, _figure)
+    except Exception as e:
+        error = '{0}: {1}'.format(type(e).__name__, e)
+    times = dict((stage, seconds - before.get(stage, 0.0)) for stage, seconds in _times.items())
+    return (index, job['oFile'], error, times)
+
+#################################################################################################################
+# @brief renders all the jobs of a batch, on a pool of worker processes
+# @param jobs              (list)               jobs, as returned by readManifest
+# @param opts              (dict)               command line options (workers, exact, cache, verbose)
+# @param fig               (Figure)             figure to reuse when the jobs run in this process; without it, a
+#                                               figure is created for the batch and closed afterwards
+# @return the number of failed jobs (each failure is reported on stderr)
+def runBatch(jobs, opts, fig=None):
+    global _figure
+    workers = opts['workers'] or multiprocessing.cpu_count()
+    tasks = list(enumerate(jobs))
+    if workers <= 1 or len(jobs) <= 1:
+        _initWorker(opts, fig)
+        try:
+            results = [ runJob(task) for task in tasks ]
+        finally:
+            if fig is None and _figure is not None:
+                pyplot().close(_figure)         # a long-running server would otherwise leak one per batch
+            _figure = None
+    else:
+        pool = multiprocessing.Pool(min(workers, len(jobs)), initializer=_initWorker, initargs=(opts,))
+        try:
+            results = list(pool.imap(runJob, tasks))
+        finally:
+            pool.close()
+            pool.join()
+        for result in results:
+            addTimes(result[3])                         # the stages of the workers
+    failed = 0
+    for index, oFile, error, times in results:
+        if error is not None:
+            failed += 1
+            sys.stderr.write('Job {0} ({1}) failed: {2}\n'.format(index, oFile, error))
+        elif opts['verbose']:
+            print('Job {0} ({1}) done'.format(index, oFile))
+    if opts['verbose'] or failed:
+        sys.stderr.write('{0} of {1} jobs failed\n'.format(failed, len(jobs)))
+    return failed
+
+#################################################################################################################
+# @brief plots arrays with the backend selected by option -B (cf. plotnArrays and rasterArrays)
+def plot(fds, fns, oFile, title, xlabel, opts, fig=None):
+    if opts['backend'] == 'raster':
+        rasterArrays(fds, fns, oFile, title, xlabel, opts['exact'], opts['verbose'])
+    else:
+        plotnArrays(fds, fns, oFile, title, xlabel, opts['exact'], opts['verbose'], fig)
+
+#################################################################################################################
+# @brief runs one plot (or batch) as described by a set of command line options
+# @param opts              (dict)               options, as returned by parseArgs
+# @param fig               (Figure)             figure to reuse, if any
+# @param memCache          (arrayCache)         in-memory cache of parsed inputs, if any
+# @return 0 on success, -1 on failure (reported on stderr)
+def run(opts, fig=None, memCache=None):
+    if opts['verbose']:
+        if opts['manifest'] is not None:
+            print('Manifest   : {0}'.format(opts['manifest']))
+        else:
+            print('Input files: {0}'.format(opts['fns']))
+            print('Output file: {0}'.format(opts['oFile']))
+            print('Title      : {0}'.format(opts['title']))
+            print('xlabel     : {0}'.format(opts['xlabel']))
+        if opts['From'] != 0 or opts['To'] != 0:
+            print('From: {0}'.format(opts['From']))
+            print('To  : {0}'.format(opts['To']))
+        if opts['cacheDir'] is not None:
+            print('Cache      : {0} ({1} MB)'.format(opts['cacheDir'], opts['cacheLimit']))
+
+    if opts['manifest'] is not None:
+        try:
+            jobs = readManifest(opts['manifest'], opts)
+        except (IOError, OSError, ValueError, KeyError) as e:
+            sys.stderr.write('Manifest {0} could not be read ({1}). Bailing out...\n'.format(opts['manifest'], e))
+            return -1
+        status = -1 if runBatch(jobs, opts, fig) else 0
+        if opts['verbose']:
+            reportTimes()
+        return status
+
+    if not opts['fns']:
+        sys.stderr.write('At least one file must be specified on the command line. Bailing out...\n')
+        return -1
+    try:
+        fds = loadFiles(opts['fns'], opts['From'], opts['To'], opts['cacheDir'], opts['cacheLimit'], opts['verbose'],
+                        memCache, opts['threads'])
+    except IOError as e:
+        sys.stderr.write('{0}. Bailing out...\n'.format(e))
+        return -1
 
     # Now we know that the contents of all the files in fns[] is in the numpy arrays fds[]
 
-    plotnArrays(fds, fns, oFile, title, xlabel)
+    plot(fds, opts['fns'], opts['oFile'], opts['title'], opts['xlabel'], opts, fig)
+    if opts['verbose']:
+        reportTimes()
+    return 0
+
+#################################################################################################################
+# @brief serves plot requests on a Unix domain socket until interrupted
+# @details Each request is a JSON object { "argv" : [ options ], "cwd" : directory } on one line; the reply is a JSON
+#          object { "status" : 0 or -1, "stdout" : text, "stderr" : text } on one line. Requests are served one at a
+#          time in the client's working directory, with a single reused figure and an in-memory cache of parsed inputs.
+# @param path              (str)                socket path (a stale socket is replaced; any other file, or the socket
+#                                               of a running server, is left alone and reported as an error)
+# @param memoryLimit       (int)                size limit of the in-memory cache, in bytes
+# @return 0 on success, -1 on failure (reported on stderr)
+def serve(path, memoryLimit):
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            sys.stderr.write('{0} exists and is not a socket. Bailing out...\n'.format(path))
+            return -1
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            sys.stderr.write('A server is already listening on {0}. Bailing out...\n'.format(path))
+            return -1
+        except socket.error as e:
+            if e.errno != errno.ECONNREFUSED:
+                sys.stderr.write('Socket {0} could not be checked ({1}). Bailing out...\n'.format(path, e))
+                return -1
+        finally:
+            probe.close()
+        os.remove(path)                                 # stale socket: nobody is listening
+
+    fig      = pyplot().figure(figsize=(10,7))
+    memCache = arrayCache(memoryLimit)
+    home     = os.getcwd()
+
+    class handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line:
+                return                                  # connection closed without a request (e.g. a liveness probe)
+            out, err = StringIO(), StringIO()
+            stdout, stderr = sys.stdout, sys.stderr
+            status = -1
+            try:
+                request = json.loads(line.decode('utf-8'))
+                sys.stdout, sys.stderr = out, err
+                os.chdir(request.get('cwd', home))
+                resetTimes()
+                with timed('args'):
+                    opts = parseArgs(['plotTxtFiles'] + list(request['argv']))
+                if opts is None:
+                    sys.stderr.write('Error in the commandline arguments. Bailing out...\n')
+                elif opts['socket'] is not None or opts['follow'] is not None:
+                    sys.stderr.write('Options -S and -F are not available in requests\n')
+                else:
+                    status = run(opts, fig, memCache)
+            except Exception:
+                err.write(traceback.format_exc())
+            finally:
+                sys.stdout, sys.stderr = stdout, stderr
+                os.chdir(home)
+            reply = { 'status' : status, 'stdout' : out.getvalue(), 'stderr' : err.getvalue() }
+            self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+
+    # any peer able to connect gets files written as this user: the socket is created private (0600), the umask
+    # being set for the bind so that there is no window in which other users could connect
+    server = socketserver.UnixStreamServer(path, handler, bind_and_activate=False)
+    umask  = os.umask(0o177)
+    try:
+        server.server_bind()
+    except:
+        server.server_close()
+        raise
+    finally:
+        os.umask(umask)
+    os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+    server.server_activate()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+    return 0
+
+class seriesTail(object):
+    #############################################################################################################
+    # @brief incremental loader of a growing text file (one number per line), restricted to lines [From:To+1]
+    # @details Each poll reads from the byte offset reached by the previous one and parses only the complete lines
+    #          appended since then; the partial last line is kept for the next poll. Values accumulate in a buffer
+    #          whose capacity doubles when full. A file that shrinks (truncated or rewritten) is reloaded from scratch.
+    # @param fn                (str)                path of the file (IOError is raised if it cannot be opened)
+    # @param From              (int)                first line (From == To == 0: all the lines)
+    # @param To                (int)                last line
+    def __init__(self, fn, From=0, To=0):
+        self.fn     = fn
+        self.f      = open(fn, 'rb')
+        self.From   = From
+        self.To     = To if From != 0 or To != 0 else None
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.tail   = b''
+        self.lines  = 0                                 # complete lines read so far
+        self.buffer = np.empty(1024)
+        self.n      = 0
+
+    #############################################################
+    # @brief whether line To has been read (never without To)
+    def done(self):
+        return self.To is not None and self.lines > self.To
+
+    ###################################################################
+    # @brief the values read so far (a view of the internal buffer)
+    @property
+    def values(self):
+        return self.buffer[:self.n]
+
+    #############################################################################################
+    # @brief parses the lines appended since the previous poll
+    # @return the number of new values
+    def poll(self):
+        if os.fstat(self.f.fileno()).st_size < self.offset:
+            self.reset()
+        if self.done():
+            return 0
+        self.f.seek(self.offset)
+        chunk = self.f.read()
+        self.offset += len(chunk)
+        data = self.tail + chunk
+        n = data.count(b'\n')
+        if n == 0:
+            self.tail = data
+            return 0
+        end = data.rfind(b'\n')
+        self.tail = data[end + 1:]
+
+        # lines [self.lines, self.lines + n[ are now complete: keep those in [From, To]
+        first = max(self.From - self.lines, 0)
+        last  = n if self.To is None else min(n, self.To + 1 - self.lines)
+        self.lines += n
+        if first >= last:
+            return 0
+        start = nthNewline(data, first) + 1 if first > 0 else 0
+        if last < n:
+            end = nthNewline(data, last)
+        values = parseLines(data[start:end + 1], last - first)
+
+        if self.n + values.size > self.buffer.size:
+            grown = np.empty(max(2 * self.buffer.size, self.n + values.size))
+            grown[:self.n] = self.buffer[:self.n]
+            self.buffer = grown
+        self.buffer[self.n:self.n + values.size] = values
+        self.n += values.size
+        return values.size
+
+    def close(self):
+        self.f.close()
+
+#################################################################################################################
+# @brief follows growing input files, re-rendering the plot whenever lines are appended (option -F)
+# @details The figure and its line artists are created once; each update only sets the data of the lines and the
+#          axis limits before saving the image again.
+# @param opts              (dict)               options, as returned by parseArgs (opts['follow'] is the interval)
+# @return 0 on success, -1 on failure (reported on stderr)
+def follow(opts):
+    if not opts['fns']:
+        sys.stderr.write('At least one file must be specified on the command line. Bailing out...\n')
+        return -1
+    if opts['From'] < 0 or opts['To'] < 0:
+        # the tail of a growing file has no fixed end to count negative lines from
+        sys.stderr.write('Options -f and -t cannot be negative when following files. Bailing out...\n')
+        return -1
+    tails = []
+    for fn in opts['fns']:
+        try:
+            tails.append(seriesTail(fn, opts['From'], opts['To']))
+        except (IOError, OSError):
+            sys.stderr.write('File {0} could not be accessed. Bailing out...\n'.format(fn))
+            return -1
+
+    raster = opts['backend'] == 'raster'
+    if not raster:
+        fig = pyplot().figure(figsize=(10,7))
+        ax  = fig.add_subplot(111)
+        ax.set_xlabel(opts['xlabel'])
+        ax.set_title(opts['title'])
+        lines   = [ ax.plot([], [], styles[i % len(styles)], label=str(i))[0] for i in range(len(tails)) ]
+        buckets = 0 if opts['exact'] else int(fig.get_size_inches()[0] * fig.dpi)
+
+    first = True
+    try:
+        while True:
+            new = sum([ t.poll() for t in tails ])
+            if new or first:
+                if raster:
+                    rasterArrays([ t.values for t in tails ], opts['fns'], opts['oFile'], opts['title'],
+                                 opts['xlabel'], opts['exact'])
+                else:
+                    lenX, Min, Max = 0, np.inf, -np.inf
+                    for line, t in zip(lines, tails):
+                        x, y = decimate(t.values, buckets)
+                        line.set_data(x, y)
+                        lenX = max(lenX, t.n)
+                        if np.any(~np.isnan(y)):
+                            Min = min(Min, np.nanmin(y))
+                            Max = max(Max, np.nanmax(y))
+                    if Min > Max:
+                        Min, Max = 0.0, 1.0
+                    sz = (Max - Min) / 50 if Max > Min else 1.0     # add extra border
+                    ax.axis([0, max(lenX, 1), Min - sz, Max + sz])
+                    fig.savefig(opts['oFile'])
+                if opts['verbose']:
+                    print('{0}: {1} new values, {2} in total'.format(time.strftime('%H:%M:%S'), new, [ t.n for t in tails ]))
+                    sys.stdout.flush()
+                first = False
+            if all([ t.done() for t in tails ]):
+                break
+            time.sleep(opts['follow'])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for t in tails:
+            t.close()
+        if not raster:
+            plt.close(fig)
+    return 0
+
+#****************************************************************************
+## Main entry point
+#{
+if __name__ == '__main__' :
+
+    argv = sys.argv
+    argc = len(argv)
+
+    if argc == 1:
+        sys.stderr.write('At least one file must be specified on the command line. Bailing out...\n')
+        sys.exit(-1)
+
+    # Now we know that we have args on the command line
+
+    with timed('args'):
+        opts = parseArgs(argv)
+    if opts is None:
+        sys.stderr.write('Error in the commandline arguments. Bailing out...\n')
+        sys.exit(-1)
+
+    if opts['socket'] is not None:
+        if opts['verbose']:
+            print('Serving plot requests on {0} (memory cache: {1} MB)'.format(opts['socket'], opts['memoryLimit']))
+        sys.exit(serve(opts['socket'], opts['memoryLimit'] << 20))
+
+    if opts['follow'] is not None:
+        sys.exit(follow(opts))
+
+    sys.exit(run(opts))
 #} end of main and file
@@ -0,0 +1,558 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+__author__    = "Eidon (Eidon@tutanota.com)"
+__module__    = "template_dictionaries.py"
+__version__   = "1.2"
+__revision__  = filter(str.isdigit, "$Revision: 1 $")
+__date__      = filter(str.isalnum, "$Date: 2026-10-18 $")
+
+VERSION = '1.2'
+DATE = '2026-10-18'
+
+# @author Eidon (Eidon@tutanota.com)
+# @details Given a file with parameter dictionaries (in what follows, a 'template') and a set
+#          of 'key=value' associations, this module searches the template for 'key=...' statements
+#          and updates them accordingly.
+#          template-dictionaries.py is the command line front end of this module; the module can also
+#          be imported, to render templates in-process (cf. @API below).
+#
+# @Example       ./template-dictionary.py \
+#                   --input input.template  --output params.py \
+#                   --param    steps         43          \
+#                   --param    region       "(103, 2)"   \
+#                   --paramstr product       soda
+#
+#                1) input.template is scanned for lines such as
+#                             'steps' = '...',
+#                             'region' = '...',
+#                             'product' = '...',
+#                   where '...' means whatever string enclosed in ' characters
+#                2) Every occurrence of the above is changed into
+#                             'steps' = 43,
+#                             'region' = (103, 2),
+#                             'product' = "soda",
+#                   Please note the use of quotes in the third line.
+#                3) The output goes into file params.py
+#
+# Note: the difference between --param and --paramstr is that in the latter case the value is quoted
+#
+# Keys are matched exactly: a line is updated only if its key is one of the given keys ('maxsteps' is not
+# updated by --param steps). With --warn, keys that never occur in the template are reported on stderr.
+#
+# @Sweep         ./template-dictionary.py \
+#                   --input input.template  --output params_{index}_{steps}.py \
+#                   --sweep  sweep.csv  [ --jobs 4 ]
+#
+#                renders one output per parameter set of sweep.csv, parsing the template only once.
+#                The sweep table is either
+#                 - a CSV file: a header line with the keys, then one line per parameter set;
+#                 - a JSON list of objects { key : value }, one per parameter set;
+#                 - a JSON object { key : [ values ] }: the cartesian product of the lists.
+#                A key ending in ':str' is substituted as with --paramstr (e.g. 'product:str'). Keys missing
+#                from a set (or empty CSV cells) keep the values given with --param/--paramstr, if any.
+#                The output file name is built with str.format from the pattern given via --output:
+#                {index} is the number of the parameter set (from 0), {key} its value of key; two sets
+#                producing the same name are an error, reported before anything is written. Option
+#                --jobs renders the outputs on a pool of processes (0: one per CPU). Each output is byte
+#                for byte what the corresponding single run would write.
+#
+# @Compiled      The template is scanned once into a compiled form: the static text segments between the
+#                'key' : 'value' lines, and an index of these substitution sites keyed by parameter name.
+#                Rendering then only replaces the indexed sites and joins the segments, without any regex.
+#                With --cache dir, compiled templates are saved in dir (file <SHA-1 of the template>.json)
+#                and reused by later runs as long as the template content is unchanged.
+#
+# @Stream        ./template-dictionary.py --stream  [ --input file ] [ --output file ]  --param ...
+#
+#                substitutes the template line by line, in constant memory: each line is written as soon
+#                as it is read, through buffered I/O. The input defaults to stdin and the output to stdout
+#                (also selected with '-'). The output is the same as without --stream, and --verbose
+#                still reports (on stderr) how many times each key was replaced.
+#
+# @API           import template_dictionaries as td
+#
+#                t = td.template(path='input.template')           # read and compiled once
+#                text = t.render({ 'steps' : 43, 'product' : 'soda' }, { 'product' : True })
+#                t.write('params.py', { 'steps' : 44, 'region' : (103, 2) })
+#
+#                td.substitute({ 'steps' : 43 }, path='input.template', output='params.py')
+#
+#                The second dictionary tells which values are quoted (--paramstr); values that are not
+#                strings are converted with str(). The regex is compiled once, at import, and templates
+#                are compiled once per template object (substitute keeps the last few it compiled), so
+#                that thousands of renders run in the calling process.
+#
+
+import sys, os
+import re
+import csv
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+
+# <space>  'key'      : 'value'     <whatever>
+# group(1) 'group(3)' : 'group(9)'
+p = re.compile(r"(\s*)(')([a-zA-Z_]+)(')(\s*)(:)(\s*)(')(.*)(')(.*)$")
+
+COMPILED = b'template-dictionaries compiled template v2\n'   # hashed with the template: changing it voids the caches
+
+# %SITE
+# %STARTDATE
+# %ENDDATE
+
+def options():
+    sys.stderr.write('Options: --start[_date] date   --end[_date] date\n')
+    sys.stderr.write('         [ --input file ] [ --output file ]\n')
+    sys.stderr.write('         [ --param key value ] [ --paramstr key value ] [ --verbose ] [ --warn ]\n')
+    sys.stderr.write('         [ --sweep table.csv|table.json [ --jobs n ] ] [ --cache dir ] [ --stream ]\n')
+
+# Compiles a template (its text) once.
+# Returns { 'parts' : [ static text, site line, static text, ..., static text ],
+#           'heads' : text of each site up to the colon, 'index' : { key : [ site numbers ] } },
+# site j being parts[2*j+1].
+def compileTemplate(text):
+    lines = text.split('\n')
+    lines = [ line + '\n' for line in lines[:-1] ] + ([ lines[-1] ] if lines[-1] else [])
+    parts, heads, index = [], [], {}
+    static = []
+    for line in lines:
+        # does the line specify a 'key' : 'value' pair?
+        m = p.match(line)
+        if  m:
+            parts.append(''.join(static))
+            parts.append(line)
+            static = []
+            index.setdefault(m.group(3), []).append(len(heads))
+            #            space         '        key        '    space
+            heads.append(m.group(1) + r"'" + m.group(3) + r"'" + m.group(5))
+        else:
+            static.append(line)
+    parts.append(''.join(static))
+    return { 'parts' : parts, 'heads' : heads, 'index' : index }
+
+# Returns the compiled form of a template, from the cache directory if it holds it (else it is
+# compiled and saved there). Cache errors are reported and otherwise ignored. Compiled templates
+# are stored as JSON, never unpickled: a cache entry that does not have the shape returned by
+# compileTemplate is compiled again.
+def loadCompiled(text, cacheDir, verbose=False):
+    data = text if isinstance(text, bytes) else text.encode('utf-8', 'surrogateescape')
+    path = os.path.join(cacheDir, hashlib.sha1(COMPILED + data).hexdigest() + '.json')
+    try:
+        with open(path, 'rb') as f:
+            compiled = fromJson(json.loads(f.read().decode('ascii')))
+        if verbose:
+            sys.stderr.write('Compiled template %s loaded.\n' %(path))
+        return compiled
+    except Exception:
+        pass                                            # missing or malformed: compile again and overwrite it
+
+    compiled = compileTemplate(text)
+    try:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+        tmp = '%s.%d.tmp' %(path, os.getpid())
+        with open(tmp, 'wb') as g:
+            g.write(json.dumps(toJson(compiled)).encode('ascii'))
+        os.rename(tmp, path)
+        if verbose:
+            sys.stderr.write('Compiled template %s saved.\n' %(path))
+    except (IOError, OSError) as e:
+        sys.stderr.write('Problems saving the compiled template in %s (%s).\n' %(cacheDir, e))
+    return compiled
+
+# Python 2 templates are byte strings: they are stored as latin-1 text, which round-trips any byte.
+# (Python 3 strings round-trip as they are, the undecodable bytes of surrogateescape included.)
+if bytes is str:
+    _toText, _fromText = (lambda s: s.decode('latin-1')), (lambda s: s.encode('latin-1'))
+else:
+    _toText, _fromText = (lambda s: s), (lambda s: s)
+
+# Converts a compiled template to the JSON value saved in the cache.
+def toJson(compiled):
+    return { 'parts' : [ _toText(s) for s in compiled['parts'] ],
+             'heads' : [ _toText(s) for s in compiled['heads'] ],
+             'index' : dict((_toText(key), sites) for key, sites in compiled['index'].items()) }
+
+# Converts a JSON value read from the cache back to a compiled template, raising ValueError if it
+# does not have the shape returned by compileTemplate.
+def fromJson(value):
+    text = type(u'')
+    parts, heads, index = value['parts'], value['heads'], value['index']
+    if (not isinstance(parts, list) or not isinstance(heads, list) or not isinstance(index, dict)
+            or len(parts) != 2 * len(heads) + 1
+            or not all(isinstance(s, text) for s in parts + heads)):
+        raise ValueError('malformed compiled template')
+    for sites in index.values():
+        if (not isinstance(sites, list)
+                or not all(type(j) is int and 0 <= j < len(heads) for j in sites)):
+            raise ValueError('malformed compiled template')
+    return { 'parts' : [ _fromText(s) for s in parts ],
+             'heads' : [ _fromText(s) for s in heads ],
+             'index' : dict((str(key), sites) for key, sites in index.items()) }
+
+# Renders a compiled template: the sites whose key is in param (a dictionary lookup: exact match)
+# hold the new value specified by the user. pstr tells which values are quoted; occur counts the
+# replacements of each key. Returns the text of the output.
+def render(compiled, param, pstr, occur):
+    parts = list(compiled['parts'])
+    heads = compiled['heads']
+    index = compiled['index']
+    for key in param:
+        if key in index:
+            # reconstruct the lines with the new value specified by the user
+            if pstr.get(key):
+                #          : '       key         ',
+                tail = r": '" + param[key] + r"'," + '\n'
+            else:
+                #          :        key           ,
+                tail = r": " + param[key] + r"," + '\n'
+            for j in index[key]:
+                parts[2 * j + 1] = heads[j] + tail
+            occur[key] = occur.get(key, 0) + len(index[key])
+    return ''.join(parts)
+
+# A template, compiled once and rendered in-process any number of times (cf. @API above).
+# The template is given either as text or as the path of a file (IOError is raised if it cannot
+# be read); with cacheDir, its compiled form goes through the cache of --cache.
+class template(object):
+    def __init__(self, text=None, path=None, cacheDir=None):
+        if path is not None:
+            with open(path) as f:
+                text = f.read()
+        if text is None:
+            raise ValueError('a template text or path is required')
+        self.compiled = compileTemplate(text) if cacheDir is None else loadCompiled(text, cacheDir)
+
+    # The keys of the substitution sites of the template.
+    def keys(self):
+        return list(self.compiled['index'])
+
+    # Returns the rendered text. pstr tells which keys have quoted values (default: none);
+    # occur, if given, counts the replacements of each key.
+    def render(self, param, pstr=None, occur=None):
+        param = dict((key, value if isinstance(value, str) else str(value)) for key, value in param.items())
+        return render(self.compiled, param, pstr or {}, occur if occur is not None else {})
+
+    # Renders the template into a file (cf. render). Returns the replacements of each key.
+    def write(self, path, param, pstr=None):
+        occur = dict((key, 0) for key in param)
+        text = self.render(param, pstr, occur)
+        with open(path, 'w') as g:
+            g.write(text)
+        return occur
+
+_templates = {}                                         # the templates last compiled by substitute, by text or path
+_templatesOrder = []
+
+# Renders a template given as text or as a path (cf. template), writing it into output if given.
+# Returns the rendered text. The last 16 templates are kept compiled (a template read from a path is
+# compiled again when the file changes).
+def substitute(param, pstr=None, text=None, path=None, output=None, occur=None, cacheDir=None):
+    if path is not None:
+        st  = os.stat(path)
+        key = ('path', os.path.abspath(path), st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime))
+    else:
+        key = ('text', text)
+    t = _templates.get(key)
+    if t is None:
+        t = template(text, path, cacheDir)
+        _templates[key] = t
+        _templatesOrder.append(key)
+        if len(_templatesOrder) > 16:
+            del _templates[_templatesOrder.pop(0)]
+    result = t.render(param, pstr, occur)
+    if output is not None:
+        with open(output, 'w') as g:
+            g.write(result)
+    return result
+
+# Substitutes a template line by line, from file f to file g (cf. @Stream above). Each line whose key
+# is in param is substituted as by render; occur counts the replacements of each key.
+def stream(f, g, param, pstr, occur):
+    for line in f:
+        # does the line specify a 'key' : 'value' pair, with one of the keys provided by the user?
+        m = p.match(line) if "'" in line else None
+        if  m and m.group(3) in param:
+            key = m.group(3)
+            if pstr[key]:
+                #       space         '        key        '    space          : '       key         ',
+                line = m.group(1) + r"'" + m.group(3) + r"'" + m.group(5) + r": '" + param[key] + r"'," + '\n'
+            else:
+                #       space         '        key        '    space          :        key           ,
+                line = m.group(1) + r"'" + m.group(3) + r"'" + m.group(5) + r": " + param[key] + r"," + '\n'
+            occur[key] += 1
+        g.write(line)
+
+# Reads a sweep table (cf. @Sweep above).
+# Returns a list of parameter sets, each a dictionary { key : (value, quoted) }.
+def readSweep(path):
+    def entry(key, value):
+        if key.endswith(':str'):
+            return key[:-4], (value if isinstance(value, str) else str(value), True)
+        return key, (value if isinstance(value, str) else str(value), False)
+
+    with open(path) as f:
+        if path.lower().endswith('.json'):
+            table = json.load(f)
+            if isinstance(table, dict):
+                keys  = list(table)
+                table = [ dict(zip(keys, values)) for values in itertools.product(*[ table[key] for key in keys ]) ]
+        else:
+            table = [ dict((key, value) for key, value in row.items() if value) for row in csv.DictReader(f) ]
+    return [ dict(entry(key, value) for key, value in row.items()) for row in table ]
+
+_compiled = None                                        # the compiled template of a sweep worker
+
+def _initWorker(compiled):
+    global _compiled
+    _compiled = compiled
+
+# Renders one parameter set of a sweep into its output file.
+# Returns (index, output, occurrences of each key, None on success or an error message).
+def renderJob(task):
+    index, output, param, pstr = task
+    occur = dict((key, 0) for key in param)
+    try:
+        text = render(_compiled, param, pstr, occur)
+        with open(output, 'w') as g:
+            g.write(text)
+    except Exception as e:
+        return (index, output, occur, '{0}: {1}'.format(type(e).__name__, e))
+    return (index, output, occur, None)
+
+def main(argv):
+    argc = len(argv)
+    if argc == 1:
+        options()
+        return -1
+
+    # argc > 1
+
+    input = None
+    output = None
+    sweep = None
+    jobs = 1
+    cache = None
+    streaming = False
+
+    start_date = None
+    end_date = None
+    site = 0
+    verbose = False
+    warn = False
+
+    param = {}
+    occur = {}
+    pstr  = {}
+
+    i=1
+    while i<argc:
+        # print 'argv[{0}] = {1}'.format(i, argv[i])
+        arg = argv[i].lower()
+        # print('arg = {}'.format(arg))
+
+        if    arg == '--param' :
+              # print 'arg + 1 and +2: {0}, {1}'.format(argv[i+1], argv[i+2])
+              if i+2 < argc:
+                  # if  argv[i+2][0] == r"'" and argv[i+2][-1] == r"'" :
+                  #     argv[i+2] = argv[i+2][1:-1]
+                  param[argv[i+1]] = argv[i+2]
+                  occur[argv[i+1]] = 0
+                  pstr [argv[i+1]] = False
+              i += 2
+        elif  arg == '--paramstr' :
+              if i+2 < argc:
+                  # if  argv[i+2][0] == r"'" and argv[i+2][-1] == r"'" :
+                  #     argv[i+2] = argv[i+2][1:-1]
+                  param[argv[i+1]] = argv[i+2]
+                  occur[argv[i+1]] = 0
+                  pstr [argv[i+1]] = True
+              i += 2
+        elif  arg == '--input' :
+              if i+1 < argc:
+                  input = argv[i+1]
+              i += 1
+        elif  arg == '--output' :
+              if i+1 < argc:
+                  output = argv[i+1]
+              i += 1
+        elif  arg == '--sweep' :
+              if i+1 < argc:
+                  sweep = argv[i+1]
+              i += 1
+        elif  arg == '--cache' :
+              if i+1 < argc:
+                  cache = argv[i+1]
+              i += 1
+        elif  arg == '--jobs' and i+1 < argc and argv[i+1].isdigit() :
+              jobs = int(argv[i+1])
+              i += 1
+        elif  arg == '--verbose' :
+              verbose = True
+        elif  arg == '--warn' :
+              warn = True
+        elif  arg == '--stream' :
+              streaming = True
+        else:
+              options()
+              return -1
+        i += 1
+
+    if streaming:
+        if sweep is not None:
+            options()
+            return -1
+        return streamMain(input, output, param, pstr, occur, verbose, warn)
+
+    try:
+        with open(input) as f:
+            text = f.read()
+    except:
+        sys.stderr.write('Problems accessing file %s.\n' %(input))
+        return -2
+
+    # lines = [ line.replace('%STARTDATE', start_date).replace('%ENDDATE', end_date).replace('%SITE', str(site)) for line in lines ]
+
+    compiled = compileTemplate(text) if cache is None else loadCompiled(text, cache, verbose)
+    text = None
+
+    if sweep is not None:
+        try:
+            table = readSweep(sweep)
+        except Exception as e:
+            sys.stderr.write('Problems reading sweep table %s (%s).\n' %(sweep, e))
+            return -4
+
+        # each parameter set overrides the --param/--paramstr values
+        tasks, names = [], {}
+        for index, row in enumerate(table):
+            rowParam, rowPstr = dict(param), dict(pstr)
+            for key, (value, quoted) in row.items():
+                rowParam[key], rowPstr[key] = value, quoted
+            try:
+                name = output.format(index=index, **rowParam)
+            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+                sys.stderr.write('Problems building the output file name from pattern %s (%s).\n' %(output, e))
+                return -3
+            # two parameter sets writing the same file would silently overwrite one another
+            path = os.path.normpath(os.path.abspath(name))
+            if path in names:
+                sys.stderr.write('Parameter sets %d and %d both produce output file %s; make the pattern %s unique.\n'
+                                 %(names[path], index, name, output))
+                return -3
+            names[path] = index
+            tasks.append((index, name, rowParam, rowPstr))
+
+        if jobs == 0:
+            jobs = multiprocessing.cpu_count()
+        if jobs <= 1 or len(tasks) <= 1:
+            _initWorker(compiled)
+            results = [ renderJob(task) for task in tasks ]
+        else:
+            pool = multiprocessing.Pool(min(jobs, len(tasks)), initializer=_initWorker, initargs=(compiled,))
+            try:
+                results = pool.map(renderJob, tasks, chunksize=max(1, len(tasks) // (8 * jobs)))
+            finally:
+                pool.close()
+                pool.join()
+
+        failed = 0
+        for index, name, rowOccur, error in results:
+            if error is not None:
+                failed += 1
+                sys.stderr.write('Problems accessing file %s (%s).\n' %(name, error))
+            for key in rowOccur:
+                occur[key] = occur.get(key, 0) + rowOccur[key]
+        if warn:
+            for key in occur:
+                if occur[key] == 0:
+                    sys.stderr.write('Warning: key %s does not occur in %s.\n' %(key, input))
+        if verbose:
+            sys.stderr.write('Process summary:\n')
+            for key in sorted(occur):
+                sys.stderr.write(' - Key %s has been replaced %d times.\n' %(key, occur[key]))
+            sys.stderr.write('%d of %d outputs written (\'%s\').\n' %(len(results) - failed, len(results), output))
+        return -3 if failed else 0
+
+    text = render(compiled, param, pstr, occur)
+
+    try:
+        with open(output, 'w') as g:
+            g.write(text)
+    except:
+        sys.stderr.write('Problems accessing file %s.\n' %(output))
+        return -3
+
+    summary(input, output, param, pstr, occur, verbose, warn)
+    return 0
+
+# Streaming mode (cf. @Stream above): input and output None or '-' stand for stdin and stdout.
+def streamMain(input, output, param, pstr, occur, verbose, warn):
+    try:
+        if input not in (None, '-'):
+            f = open(input, 'r', 1 << 20)
+        elif hasattr(sys.stdin, 'buffer'):
+            # Python 3: translate the line ends of stdin as open() does for a file
+            f = io.TextIOWrapper(sys.stdin.buffer, newline=None)
+        else:
+            f = sys.stdin
+    except:
+        sys.stderr.write('Problems accessing file %s.\n' %(input))
+        return -2
+    try:
+        g = sys.stdout if output in (None, '-') else open(output, 'w', 1 << 20)
+    except:
+        sys.stderr.write('Problems accessing file %s.\n' %(output))
+        closeInput(f, input)
+        return -3
+    try:
+        stream(f, g, param, pstr, occur)
+        g.flush()
+    except (IOError, OSError, UnicodeError) as e:
+        sys.stderr.write('Problems streaming %s to %s (%s).\n' %(input or '<stdin>', output or '<stdout>', e))
+        return -3
+    finally:
+        closeInput(f, input)
+        if g is not sys.stdout:
+            g.close()
+
+    summary(input or '<stdin>', output or '<stdout>', param, pstr, occur, verbose, warn)
+    return 0
+
+# Closes the input of streamMain; the wrapper of stdin is detached instead, so that collecting it does not close
+# sys.stdin.buffer.
+def closeInput(f, input):
+    if input not in (None, '-'):
+        f.close()
+    elif f is not sys.stdin:
+        f.detach()
+
+# Reports, on stderr, the keys that never occurred (warn) and the number of replacements of each key (verbose).
+def summary(input, output, param, pstr, occur, verbose, warn):
+    if warn:
+        for key in param:
+            if occur[key] == 0:
+                sys.stderr.write('Warning: key %s does not occur in %s.\n' %(key, input))
+
+    if verbose:
+        sys.stderr.write('Process summary:\n')
+
+    if verbose:
+        for key in param:
+            if pstr[key]:
+                sys.stderr.write(' - Key %s has been replaced %d times with value \'%s\'.\n' %(key, occur[key], param[key]))
+            else:
+                sys.stderr.write(' - Key %s has been replaced %d times with value %s.\n' %(key, occur[key], param[key]))
+
+    if verbose:
+        sys.stderr.write('Process concludes successfully (\'{}\').\n'.format(output))
+
+if __name__ == '__main__':
+    sys.exit(main(list(sys.argv)))
+
+# EoF (template_dictionaries.py)